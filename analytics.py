@@ -0,0 +1,229 @@
+"""
+Headless analytics over the learners' attempt logs (PROFILES_DIR/<learner>/attempts.bin).
+
+Everything is computed column-wise with NumPy on the concatenated logs, so millions of attempts
+take seconds. Only NumPy is needed; Parquet export additionally needs pyarrow.
+
+    python analytics.py --format csv --output stats
+    python analytics.py --by-learner --since 30 --format parquet --output stats
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import PROFILES_DIR, ATTEMPTS_FILE, ASL_ALPHABET
+from utils.attempt_log import ATTEMPT_DTYPE, MODES, load_attempts
+
+DAY_S = 86400
+QUANTILES = (0.25, 0.5, 0.75, 0.9)
+ALL_LEARNERS = "all"
+
+
+def load_profiles(profiles_dir=PROFILES_DIR, learners=None):
+    """
+    Returns: (attempts, learner_ids, learner_names) where attempts holds the records of all
+    learners concatenated and learner_ids[i] indexes learner_names for attempts[i]
+    """
+    if learners is None:
+        learners = os.listdir(profiles_dir) if os.path.isdir(profiles_dir) else []
+    names = sorted(learners)
+    parts, ids, found = [], [], []
+    for name in names:
+        path = os.path.join(profiles_dir, name, ATTEMPTS_FILE)
+        if not os.path.exists(path):
+            continue
+        records = load_attempts(path)
+        parts.append(records)
+        ids.append(np.full(len(records), len(found), dtype=np.int32))
+        found.append(name)
+
+    if not parts:
+        return np.zeros(0, dtype=ATTEMPT_DTYPE), np.zeros(0, dtype=np.int32), []
+    return np.concatenate(parts), np.concatenate(ids), found
+
+
+def _group_quantiles(keys, values, n_groups, quantiles=QUANTILES):
+    """Returns: (n_groups, len(quantiles)) array of per-group quantiles (NaN for empty groups)"""
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    starts = np.searchsorted(keys, np.arange(n_groups), side="left")
+    sizes = np.searchsorted(keys, np.arange(n_groups), side="right") - starts
+
+    result = np.full((n_groups, len(quantiles)), np.nan)
+    present = sizes > 0
+    for j, q in enumerate(quantiles):
+        # Nearest-rank quantile: index into each group's sorted slice
+        index = starts[present] + np.floor(q * (sizes[present] - 1)).astype(np.int64)
+        result[present, j] = values[index]
+    return result
+
+
+def _linear_slopes(keys, x, y, n_groups):
+    """Returns: least-squares slope of y over x per group (NaN when x doesn't vary)"""
+    n = np.bincount(keys, minlength=n_groups)
+    sx = np.bincount(keys, x, n_groups)
+    sy = np.bincount(keys, y, n_groups)
+    sxy = np.bincount(keys, x * y, n_groups)
+    sxx = np.bincount(keys, x * x, n_groups)
+    denominator = n * sxx - sx * sx
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 1e-9, (n * sxy - sx * sy) / denominator, np.nan)
+
+
+def letter_stats(attempts, learner_ids, learner_names, by_learner=False):
+    """
+    Per (learner, mode, letter) accuracy, time-to-correct quantiles and accuracy trend.
+    Returns: dict of equally long columns, groups without attempts are left out
+    """
+    n_learners = len(learner_names) if by_learner else 1
+    learners = learner_ids if by_learner else np.zeros(len(attempts), dtype=np.int32)
+    n_groups = n_learners * len(MODES) * len(ASL_ALPHABET)
+    keys = (learners.astype(np.int64) * len(MODES) + attempts["mode"]) * len(ASL_ALPHABET) + attempts["target"]
+
+    correct = attempts["correct"].astype(np.float64)
+    count = np.bincount(keys, minlength=n_groups)
+    n_correct = np.bincount(keys, correct, n_groups)
+    mean_error = np.bincount(keys, attempts["error"].astype(np.float64), n_groups)
+
+    solved = attempts["correct"] == 1
+    time_quantiles = _group_quantiles(keys[solved], attempts["duration"][solved].astype(np.float64), n_groups)
+
+    # Accuracy change per week, from a regression of correctness on the attempt time. Times are
+    # taken from each group's first attempt, so the sums stay small and the slope well-conditioned
+    first = np.full(n_groups, np.inf)
+    np.minimum.at(first, keys, attempts["timestamp"])
+    weeks = (attempts["timestamp"] - first[keys]) / (7 * DAY_S)
+    trend = _linear_slopes(keys, weeks, correct, n_groups)
+
+    present = np.flatnonzero(count)
+    learner_index, rest = np.divmod(present, len(MODES) * len(ASL_ALPHABET))
+    mode_index, letter_index = np.divmod(rest, len(ASL_ALPHABET))
+    names = np.array(learner_names if by_learner else [ALL_LEARNERS], dtype=object)
+    columns = {
+        "learner": names[learner_index],
+        "mode": np.array(MODES, dtype=object)[mode_index],
+        "letter": np.array(ASL_ALPHABET, dtype=object)[letter_index],
+        "attempts": count[present],
+        "accuracy": n_correct[present] / count[present],
+        "mean_error": mean_error[present] / count[present],
+        "weekly_trend": trend[present],
+    }
+    for j, q in enumerate(QUANTILES):
+        columns[f"time_p{int(q * 100)}"] = time_quantiles[present, j]
+    return columns
+
+
+def daily_stats(attempts, learner_ids, learner_names, by_learner=False):
+    """Per (learner, UTC day) attempts, accuracy and median time-to-correct"""
+    learners = learner_ids if by_learner else np.zeros(len(attempts), dtype=np.int32)
+    days, day_index = np.unique((attempts["timestamp"] // DAY_S).astype(np.int64), return_inverse=True)
+    n_groups = (len(learner_names) if by_learner else 1) * len(days)
+    keys = learners.astype(np.int64) * len(days) + day_index
+
+    count = np.bincount(keys, minlength=n_groups)
+    n_correct = np.bincount(keys, attempts["correct"].astype(np.float64), n_groups)
+    solved = attempts["correct"] == 1
+    median_time = _group_quantiles(keys[solved], attempts["duration"][solved].astype(np.float64),
+                                   n_groups, (0.5,))[:, 0]
+
+    present = np.flatnonzero(count)
+    learner_index, day = np.divmod(present, len(days))
+    names = np.array(learner_names if by_learner else [ALL_LEARNERS], dtype=object)
+    dates = [datetime.fromtimestamp(d * DAY_S, timezone.utc).date().isoformat() for d in days]
+    return {
+        "learner": names[learner_index],
+        "date": np.array(dates, dtype=object)[day],
+        "attempts": count[present],
+        "accuracy": n_correct[present] / count[present],
+        "time_p50": median_time[present],
+    }
+
+
+def _rows(columns):
+    return zip(*(values.tolist() for values in columns.values()))
+
+
+def export_tables(tables, output, fmt):
+    """Write each table to <output>_<name>.<fmt> (csv, parquet) or all of them to <output>.json"""
+    if fmt == "json":
+        path = f"{output}.json"
+        data = {name: [dict(zip(columns, row)) for row in _rows(columns)] for name, columns in tables.items()}
+        with open(path, "w") as f:
+            # NaN isn't valid JSON, missing values are written as null
+            json.dump(_nan_to_none(data), f, indent=1)
+        return [path]
+
+    paths = []
+    for name, columns in tables.items():
+        path = f"{output}_{name}.{fmt}"
+        if fmt == "csv":
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(columns)
+                writer.writerows(_rows(columns))
+        else:
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise SystemExit("Parquet export needs pyarrow: pip install pyarrow")
+            pq.write_table(pa.table({key: list(values) if values.dtype == object else values
+                                     for key, values in columns.items()}), path)
+        paths.append(path)
+    return paths
+
+
+def _nan_to_none(value):
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, dict):
+        return {key: _nan_to_none(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_nan_to_none(item) for item in value]
+    return value
+
+
+def print_summary(letters, n_attempts, n_learners, worst=5):
+    print(f"{n_attempts} attempts from {n_learners} learners")
+    for mode in MODES:
+        rows = np.flatnonzero(letters["mode"] == mode)
+        if not len(rows):
+            continue
+        accuracy = np.average(letters["accuracy"][rows], weights=letters["attempts"][rows])
+        hardest = rows[np.argsort(letters["accuracy"][rows], kind="stable")[:worst]]
+        listed = ", ".join(f"{letters['letter'][i]} {letters['accuracy'][i]:.0%}"
+                           + (f" ({letters['learner'][i]})" if letters['learner'][i] != ALL_LEARNERS else "")
+                           for i in hardest)
+        print(f"  {mode:<6} accuracy {accuracy:.1%} | hardest: {listed}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate and export learner statistics")
+    parser.add_argument("--profiles", default=PROFILES_DIR, help="directory with one folder per learner")
+    parser.add_argument("--learner", action="append", help="only include this learner (repeatable)")
+    parser.add_argument("--since", type=float, metavar="DAYS", help="only include the last DAYS days")
+    parser.add_argument("--by-learner", action="store_true", help="one row per learner instead of pooling them")
+    parser.add_argument("--format", choices=["csv", "json", "parquet"], help="export the tables in this format")
+    parser.add_argument("--output", default="stats", help="export path prefix (default: stats)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    attempts, learner_ids, learner_names = load_profiles(args.profiles, args.learner)
+    if args.since is not None:
+        keep = attempts["timestamp"] >= time.time() - args.since * DAY_S
+        attempts, learner_ids = attempts[keep], learner_ids[keep]
+
+    tables = {
+        "letters": letter_stats(attempts, learner_ids, learner_names, args.by_learner),
+        "daily": daily_stats(attempts, learner_ids, learner_names, args.by_learner),
+    }
+    print_summary(tables["letters"], len(attempts), len(learner_names))
+    if args.format:
+        for path in export_tables(tables, args.output, args.format):
+            print(f"Wrote {path}")
+    print(f"Done in {time.perf_counter() - start:.2f} s")
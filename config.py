@@ -11,6 +11,90 @@ IMAGES_DIR = "asl_images"
 # Model settings
 MODEL_PATH = "full_model_augmented.keras"
 ASL_CLASS_NAMES = list("ABCDEFGHIKLMNOPQRSTUVWXY")  # ASL alphabets without J and Z
+ASL_MOTION_CLASS_NAMES = ["J", "Z"]  # letters that need motion, handled by the sequence model
+ASL_ALPHABET = sorted(ASL_CLASS_NAMES + ASL_MOTION_CLASS_NAMES)
+
+# Model registry settings: replacing MODEL_PATH on disk hot-swaps the model, and a model saved
+# at SHADOW_MODEL_PATH is evaluated in shadow against it
+MODEL_REGISTRY = False
+SHADOW_MODEL_PATH = "candidate_model.keras"
+SHADOW_SAMPLE_RATE = 0.1  # fraction of predictions also run through the shadow model
+SHADOW_QUEUE_SIZE = 32  # samples beyond this are dropped rather than slowing down the UI
+SHADOW_LOG_PATH = "shadow_log.csv"
+REGISTRY_POLL_S = 2.0
+
+# Hard-example capture: misclassified and low-confidence frames are kept for retraining
+HARD_EXAMPLES = False
+HARD_EXAMPLES_PATH = "hard_examples.bin"
+HARD_EXAMPLE_CONFIDENCE = 0.6  # correct predictions below this confidence are also kept
+HARD_EXAMPLE_DEDUP_TOLERANCE = 0.01  # max landmark change for a frame to count as a repeat
+HARD_EXAMPLE_QUEUE_SIZE = 256  # pending records, more are dropped
+
+# Learner profiles: per-learner files (adapters, statistics) live in PROFILES_DIR/<learner>/
+PROFILES_DIR = "profiles"
+LEARNER_NAME = "default"
+
+# Personalization: fit a per-learner copy of the output layer on frames the learner signed correctly
+PERSONALIZATION = False
+PERSONALIZATION_ADAPTER_FILE = "adapter.npz"
+PERSONALIZATION_SAMPLES_PER_LETTER = 40
+PERSONALIZATION_FRAMES_PER_CONFIRM = 5  # frames up to a correct sign that get its label
+PERSONALIZATION_MIN_NEW_SAMPLES = 50  # new samples needed before retraining
+PERSONALIZATION_EPOCHS = 200
+PERSONALIZATION_LEARNING_RATE = 0.05
+PERSONALIZATION_L2 = 0.01  # pull towards the shipped weights
+PERSONALIZATION_CPU_SHARE = 0.25  # fraction of one core the background training may use
+
+# Log of every answered question, kept in the learner's profile (analyze with: python analytics.py)
+ATTEMPTS_FILE = "attempts.bin"
+
+# Profile sync: upload attempt records to a collection service shared by the stations
+# (stand-in service: python -m utils.profile_sync)
+SYNC_ENDPOINT = None  # e.g. "http://127.0.0.1:50632" or "tcp://127.0.0.1:50633", None disables syncing
+SYNC_BATCH_SIZE = 200  # records per upload
+SYNC_INTERVAL_S = 10  # how long records may wait for a fuller batch
+SYNC_QUEUE_SIZE = 1000  # records waiting for the sync thread, more are dropped
+SYNC_MAX_PENDING = 100000  # unsent records kept while the service is unreachable
+SYNC_TIMEOUT_S = 5
+SYNC_BACKOFF_S = 1  # first retry delay, doubled on every failure
+SYNC_BACKOFF_MAX_S = 300
+SYNC_POLL_MS = 500  # how often the UI applies fetched profiles
+SYNC_SPOOL_FILE = "sync_pending.bin"  # unsent records at exit, sent on the next run
+SYNC_SERVER_DIR = "sync_data"  # where the stand-in service stores what it receives
+
+# Confusion matrix of target vs recognized letter, kept in the learner's profile
+CONFUSION_FILE = "confusion.npy"
+CONFUSION_STABLE_FRAMES = 5  # consecutive frames a prediction must hold to be counted
+CONFUSION_PAIR_PROBABILITY = 0.25  # chance of asking next the letter most confused with the last one
+CONFUSION_WEIGHT = 2.0  # how much a letter's confusion rate raises its selection weight
+
+# Training sweep settings (python train.py)
+TRAINING_DATA_PATH = "data_augmented.csv"  # landmark dataset exported by the training notebook
+TRAINING_RUNS_DIR = "training_runs"
+TRAINING_TEST_SIZE = 0.25
+TRAINING_VALIDATION_SIZE = 0.1  # share of the training data used for early stopping
+TRAINING_MAX_EPOCHS = 200
+TRAINING_PATIENCE = 10  # epochs without validation improvement before stopping
+TRAINING_LATENCY_SAMPLES = 200  # single-sample predictions timed per model
+TRAINING_SEED = 42
+
+# Streaming sequence model settings (J and Z are only offered if this file exists)
+SEQUENCE_MODEL_PATH = "sequence_model.npz"
+SEQUENCE_CLASS_NAMES = ASL_MOTION_CLASS_NAMES + ["NONE"]
+SEQUENCE_MIN_FRAMES = 8  # frames to observe before trusting a motion prediction
+SEQUENCE_CONFIDENCE = 0.8
+
+# Free spelling settings (compile a word list with: python -m utils.lexicon_trie words.txt lexicon.trie)
+LEXICON_PATH = "lexicon.trie"
+DECODER_BEAM_WIDTH = 16
+DECODER_MIN_LETTER_FRAMES = 4  # a letter must be held this long to count
+DECODER_REPEAT_LETTER_FRAMES = 12  # hold needed before the same letter counts twice (e.g. LL)
+DECODER_MEAN_LETTER_FRAMES = 10
+DECODER_PAUSE_FRAMES = 8  # frames without a hand that end a word
+
+# Phrase corpus settings (compile a phrase list with: python -m utils.phrase_corpus phrases.txt phrases.bin)
+PHRASE_CORPUS_PATH = "phrases.bin"
+PHRASE_CORPUS_TOP_K = 20  # a random phrase is picked among the k best for the learner's weak letters
 
 #initialize to 1 in order to avoid division by zero for probability calculation
 errors = {
@@ -19,7 +103,7 @@ errors = {
     'text_total_errors': 1,
     'video_total_errors': 1,
     'letters': {ltr: {'video_errors': 1, 'text_errors': 1}
-                for ltr in ASL_CLASS_NAMES}
+                for ltr in ASL_ALPHABET}
 }
 
 # MediaPipe settings
@@ -30,6 +114,62 @@ MEDIAPIPE_HANDS_CONFIG = {
     "min_tracking_confidence": 0.8
 }
 
+# Motion gate: reuse the last detection while the picture doesn't change (e.g. a held sign)
+MOTION_GATE = False
+MOTION_GATE_THUMBNAIL = (64, 48)  # size frames are compared at
+MOTION_GATE_PIXEL_THRESHOLD = 12  # gray level change for a thumbnail pixel to count as changed
+MOTION_GATE_CHANGED_FRACTION = 0.01  # share of changed pixels that means the scene moved
+MOTION_GATE_MAX_SKIP = 5  # frames in a row that may reuse a detection before a full one is forced
+
+# Prediction cache: reuse the model output for poses that were already classified
+PREDICTION_CACHE = False
+PREDICTION_CACHE_SIZE = 2048  # entries, least recently used ones are evicted
+PREDICTION_CACHE_TOLERANCE = 0.1  # grid step of the pose key, as a fraction of the hand size
+PREDICTION_CACHE_PROJECTIONS = 12  # random directions the pose is hashed on, fewer means more hits
+PREDICTION_CACHE_AUDIT_RATE = 0.05  # share of hits also run through the model to measure drift
+PREDICTION_CACHE_STATS_PATH = "prediction_cache_stats.json"
+
+# Inference worker settings
+INFERENCE_WORKER = False  # run the hand detector in a separate process
+WORKER_FRAME_SLOTS = 3  # shared-memory ring buffer size, frames beyond it are dropped
+WORKER_START_TIMEOUT_S = 60  # model loading happens during start-up
+WORKER_STOP_TIMEOUT_S = 2
+
+# Inference server settings (start the server with: python -m models.inference_server)
+INFERENCE_SERVER = False  # use the shared server when it is running, else load the model in-process
+INFERENCE_SERVER_ADDRESS = ("127.0.0.1", 50631)  # or a Unix socket path such as "/tmp/aslquiz.sock"
+SERVER_MAX_BATCH = 64
+SERVER_MAX_WAIT_MS = 5  # latency budget for filling a batch
+SERVER_CONNECT_TIMEOUT_S = 0.5
+SERVER_READ_TIMEOUT_S = 1.0  # a reply that takes longer switches the station to its local model
+
+# Video display settings
+VIDEO_CANVAS_SIZE = (500, 400)  # frames are scaled down to fit before drawing the overlay
+MEASURE_TRANSITIONS = False  # log how long each quiz question change takes
+# Landmark overlay style (colors are BGR), set to None to hide the overlay
+LANDMARK_STYLE = {
+    "connection_color": (255, 255, 255),
+    "connection_thickness": 2,
+    "landmark_color": (0, 0, 255),
+    "landmark_radius": 3,
+}
+
 # Camera settings
 CAMERA_INDEX = 0
 FRAME_UPDATE_MS = 10  # Update interval in milliseconds
+CAMERA_PROFILES = {
+    "low": {"width": 320, "height": 240, "fps": 30, "fourcc": "MJPG"},
+    "vga": {"width": 640, "height": 480, "fps": 30, "fourcc": "MJPG"},
+    "vga_yuyv": {"width": 640, "height": 480, "fps": 30, "fourcc": "YUYV"},
+    "hd": {"width": 1280, "height": 720, "fps": 30, "fourcc": "MJPG"},
+}
+CAMERA_PROFILE = None  # a name from CAMERA_PROFILES, "auto" to probe them once per camera, None for driver defaults
+CAMERA_PROBE_FRAMES = 15  # frames timed per profile when probing
+CAMERA_PROBE_CACHE = "camera_profiles.json"  # profile picked by the probe for each camera index
+CAMERA_MIN_BUFFER = True  # always hand the newest frame to the detector, never a queued one
+
+# Multi-learner settings (run with: python multi_learner.py 0 1 video.mp4)
+MULTI_STREAM_SOURCES = [0]
+MULTI_STREAM_WORKERS = None  # MediaPipe threads, defaults to one per stream
+MULTI_STREAM_PANEL_SIZE = (320, 240)
+FPS_WINDOW = 30  # frames used to compute the FPS figures
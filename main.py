@@ -1,3 +1,4 @@
+import logging
 import os
 
 # Disable TensorFlow warnings
@@ -7,6 +8,7 @@ import customtkinter as ctk
 from ui.app import ASLQuizApp
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
     ctk.set_appearance_mode("dark")
     app = ASLQuizApp()
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
@@ -0,0 +1,94 @@
+import heapq
+import math
+
+from config import (DECODER_BEAM_WIDTH, DECODER_MIN_LETTER_FRAMES, DECODER_REPEAT_LETTER_FRAMES,
+                    DECODER_MEAN_LETTER_FRAMES, DECODER_PAUSE_FRAMES)
+from utils.lexicon_trie import LexiconTrie
+
+PROBABILITY_FLOOR = 1e-6
+
+
+class FingerspellingDecoder:
+    """
+    Turns a stream of per-frame letter probability vectors into words.
+
+    Each hypothesis is a position in the lexicon trie plus the letter currently being held
+    and for how many frames. Durations follow a geometric model with a minimum hold time,
+    and the same letter twice in a row (e.g. the LL in HELLO) needs a longer hold. Only
+    the best `beam_width` hypotheses survive each frame, and a pause with no hand in view
+    ends the current word.
+    """
+
+    def __init__(self, trie, letters, beam_width=DECODER_BEAM_WIDTH):
+        self.trie = trie
+        self.letter_index = {letter: i for i, letter in enumerate(letters)}
+        self.beam_width = beam_width
+
+        self.min_frames = DECODER_MIN_LETTER_FRAMES
+        self.repeat_frames = max(DECODER_REPEAT_LETTER_FRAMES, self.min_frames)
+        self.stay_logp = math.log(1.0 - 1.0 / DECODER_MEAN_LETTER_FRAMES)
+        self.switch_logp = math.log(1.0 / DECODER_MEAN_LETTER_FRAMES)
+
+        self.words = []
+        self.reset_word()
+
+    def reset_word(self):
+        """Drop the word in progress and start again from the root of the trie"""
+        # Hypothesis: (score, node, text, letter being held, frames held)
+        self.beam = [(0.0, LexiconTrie.ROOT, "", None, 0)]
+        self.blank_frames = 0
+
+    def clear(self):
+        self.words = []
+        self.reset_word()
+
+    def step(self, probabilities):
+        """Advance the decoder by one frame; `probabilities` is None when no hand is detected"""
+        if probabilities is None:
+            self.blank_frames += 1
+            if self.blank_frames == DECODER_PAUSE_FRAMES:
+                self._commit_word()
+            return
+        self.blank_frames = 0
+
+        logp = [math.log(max(float(p), PROBABILITY_FLOOR)) for p in probabilities]
+        candidates = {}
+        for score, node, text, letter, held in self.beam:
+            # Keep holding the current letter
+            if letter is not None:
+                self._add(candidates, score + self.stay_logp + logp[self.letter_index[letter]],
+                          node, text, letter, held + 1)
+
+            # Move on to a letter that continues a word in the lexicon
+            if letter is None or held >= self.min_frames:
+                base = score + (self.switch_logp if letter is not None else 0.0)
+                for next_letter, child in self.trie.children(node):
+                    idx = self.letter_index.get(next_letter)
+                    if idx is None or (next_letter == letter and held < self.repeat_frames):
+                        continue
+                    self._add(candidates, base + logp[idx], child, text + next_letter, next_letter, 1)
+
+        self.beam = heapq.nlargest(self.beam_width, candidates.values(), key=lambda h: h[0])
+
+    def _add(self, candidates, score, node, text, letter, held):
+        # Hold times past the repeat threshold behave the same, so they share a beam slot
+        key = (node, min(held, self.repeat_frames))
+        current = candidates.get(key)
+        if current is None or score > current[0]:
+            candidates[key] = (score, node, text, letter, held)
+
+    def _commit_word(self):
+        """End the word in progress, keeping the best hypothesis that spells a full word"""
+        complete = [h for h in self.beam if self.trie.is_terminal(h[1]) and h[4] >= self.min_frames]
+        if complete:
+            self.words.append(max(complete, key=lambda h: h[0])[2])
+        self.reset_word()
+
+    def current_letter(self):
+        return max(self.beam, key=lambda h: h[0])[3]
+
+    def partial_word(self):
+        return max(self.beam, key=lambda h: h[0])[2]
+
+    def transcript(self):
+        return " ".join(self.words + [self.partial_word()]).strip()
@@ -1,24 +1,61 @@
+import logging
+import os
+
 import mediapipe as mp
 import numpy as np
-import tensorflow as tf
 
-from config import MODEL_PATH, ASL_CLASS_NAMES, MEDIAPIPE_HANDS_CONFIG
+from config import (MODEL_PATH, ASL_CLASS_NAMES, ASL_MOTION_CLASS_NAMES, MEDIAPIPE_HANDS_CONFIG,
+                    SEQUENCE_MODEL_PATH, INFERENCE_SERVER, MODEL_REGISTRY, PERSONALIZATION,
+                    PERSONALIZATION_ADAPTER_FILE, PREDICTION_CACHE)
+from models.inference_server import RemoteModel
+from models.model_registry import ModelRegistry
+from models.personalization import PersonalizedModel
+from models.prediction_cache import PredictionCache
+from models.sequence_model import StreamingSequenceRecognizer
+from utils.learner_profile import profile_path
 
+logger = logging.getLogger(__name__)
 
 class HandDetector:
 
-    def __init__(self):
+    def __init__(self, model=None):
+        """ model: an already loaded classifier to share between several detectors """
         # Initialize MediaPipe hands
         self.mp_hands = mp.solutions.hands
-        self.mp_drawing = mp.solutions.drawing_utils
         self.hands = self.mp_hands.Hands(**MEDIAPIPE_HANDS_CONFIG)
 
-        # Load the trained model
-        self.model = tf.keras.models.load_model(MODEL_PATH)
+        # Load the trained model, or use the shared inference server if one is running
+        self.model = model
+        if self.model is None and INFERENCE_SERVER:
+            self.model = RemoteModel.connect()
+        if self.model is None:
+            self.model = self._load_local_model()
+            if PERSONALIZATION and not isinstance(self.model, PersonalizedModel):
+                # The learner's output layer is fitted on the features of one fixed in-process network
+                logger.warning("Personalization is off, it can't be combined with the model registry")
+        elif PERSONALIZATION and model is None:
+            logger.warning("Personalization is off, it can't be combined with the inference server")
         self.class_names = ASL_CLASS_NAMES
 
+        # A personalized model learns from the frames it sees, so it is never bypassed by the cache
+        self.cache = PredictionCache() if PREDICTION_CACHE and not isinstance(self.model, PersonalizedModel) \
+            else None
+        self.cached_model = self._current_model()
+
+        # Load the streaming motion model for J and Z if it has been trained
+        self.sequence_recognizer = None
+        if os.path.exists(SEQUENCE_MODEL_PATH):
+            self.sequence_recognizer = StreamingSequenceRecognizer(SEQUENCE_MODEL_PATH)
+
+        # Letters this detector can recognize
+        self.letters = sorted(self.class_names + ASL_MOTION_CLASS_NAMES) \
+            if self.sequence_recognizer else list(self.class_names)
+
     def process_frame(self, frame):
-        """Returns: (processed_frame, results) where results is the MediaPipe detection results"""
+        """
+        Returns: (frame, results) where results is the MediaPipe detection results.
+        The frame is left untouched, landmarks are drawn later on the scaled-down display image.
+        """
         results = self.hands.process(frame)
 
         # Filter out left hands and keep only the right hand
@@ -38,18 +75,14 @@ class HandDetector:
                 results.multi_hand_landmarks = None
                 results.multi_handedness = None
 
-        # Draw landmarks on the frame if the right hand is detected
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                self.mp_drawing.draw_landmarks(
-                    frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS
-                )
-
         return frame, results
 
     def extract_landmarks(self, results):
         """ Returns: Extracted landmarks array or None if no right hands detected """
         if not results.multi_hand_landmarks:
+            # The hand left the frame, so any motion in progress is over
+            if self.sequence_recognizer:
+                self.sequence_recognizer.reset()
             return None
 
         landmarks = []
@@ -59,8 +92,9 @@ class HandDetector:
 
         return np.array([landmarks]) if len(landmarks) == 63 else None
 
-    def predict_letter(self, landmarks):
+    def predict_letter(self, landmarks, probabilities=None):
         """
+        probabilities: static model output for these landmarks, if it was already computed
         Returns:
             str: Predicted letter
             float: Confidence score
@@ -68,11 +102,90 @@ class HandDetector:
         if landmarks is None:
             return None, 0.0
 
-        prediction = self.model.predict(landmarks, verbose=0)[0]
+        # The motion model is stepped on every frame and takes precedence when it fires
+        if self.sequence_recognizer:
+            motion_letter, motion_confidence = self.sequence_recognizer.update(landmarks[0])
+            if motion_letter:
+                return motion_letter, motion_confidence
+
+        prediction = probabilities if probabilities is not None else self.predict_probabilities(landmarks)
         predicted_class_idx = np.argmax(prediction)
         confidence = prediction[predicted_class_idx]
 
         return self.class_names[predicted_class_idx], confidence
 
-    def close(self):
+    def predict_probabilities(self, landmarks):
+        """ Returns: probability vector over class_names for the static letters """
+        return self.predict_probabilities_batch(landmarks)[0]
+
+    def predict_probabilities_batch(self, landmarks):
+        """
+        landmarks: (n, 63) array with one hand per row, e.g. from several streams
+        Returns: (n, len(class_names)) probabilities, computed in at most one model call
+        """
+        if self.cache is None:
+            return self._run_model(landmarks)
+
+        # Entries belong to one model version, a hot-swapped model starts from an empty cache
+        if self._current_model() is not self.cached_model:
+            self.cached_model = self._current_model()
+            self.cache.clear()
+
+        keys = [self.cache.signature(row) for row in landmarks]
+        cached = [self.cache.get(key) for key in keys]
+        # Misses and audited hits go through the model together
+        run = [i for i, hit in enumerate(cached) if hit is None or self.cache.should_audit()]
+        probabilities = list(cached)
+        if run:
+            for i, fresh in zip(run, self._run_model(landmarks[run])):
+                if cached[i] is None:
+                    self.cache.put(keys[i], fresh)
+                else:
+                    self.cache.audit(keys[i], cached[i], fresh)
+                probabilities[i] = fresh
+        return np.array(probabilities)
+
+    def _current_model(self):
+        return self.model.primary if isinstance(self.model, ModelRegistry) else self.model
+
+    def _run_model(self, landmarks):
+        try:
+            return self.model.predict(landmarks, verbose=0)
+        except ConnectionError:
+            # The inference server went away, carry on with an in-process model
+            self.model = self._load_local_model()
+            return self.model.predict(landmarks, verbose=0)
+
+    def confirm_letter(self, letter):
+        """ The learner signed `letter` correctly: lets a personalized model learn from the last frames """
+        if isinstance(self.model, PersonalizedModel):
+            self.model.confirm(letter)
+
+    def load_learner(self):
+        """ The active learner changed: a personalized model switches to their adapter """
+        if isinstance(self.model, PersonalizedModel):
+            self.model.switch_adapter(profile_path(PERSONALIZATION_ADAPTER_FILE))
+
+    @staticmethod
+    def _load_local_model():
+        if MODEL_REGISTRY:
+            return ModelRegistry(MODEL_PATH)
+
+        # Imported here so that stations using the inference server never load TensorFlow
+        import tensorflow as tf
+        model = tf.keras.models.load_model(MODEL_PATH)
+        if PERSONALIZATION:
+            return PersonalizedModel(model, profile_path(PERSONALIZATION_ADAPTER_FILE))
+        return model
+
+    def close(self, close_model=True):
+        """ close_model: False when the classifier is shared and closed by its owner """
         self.hands.close()
+        if self.cache:
+            self.cache.export_stats()
+        if close_model:
+            self.close_model()
+
+    def close_model(self):
+        if isinstance(self.model, (RemoteModel, ModelRegistry)):
+            self.model.close()
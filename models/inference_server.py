@@ -0,0 +1,219 @@
+import argparse
+import logging
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from config import (MODEL_PATH, MODEL_REGISTRY, INFERENCE_SERVER_ADDRESS, SERVER_MAX_BATCH, SERVER_MAX_WAIT_MS,
+                    SERVER_CONNECT_TIMEOUT_S, SERVER_READ_TIMEOUT_S)
+
+# Wire format: the server greets each client with the number of classes, then every request is
+# a row count followed by float32 landmark rows and is answered with float32 probability rows.
+COUNT = struct.Struct("<I")
+N_FEATURES = 63
+
+logger = logging.getLogger(__name__)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+def _socket_family(address):
+    """A string address is a Unix socket path, a (host, port) tuple is TCP"""
+    return socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+
+
+class RemoteModel:
+    """Client side of the inference server, with the same predict() call as a Keras model"""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.n_classes = COUNT.unpack(_recv_exact(sock, COUNT.size))[0]
+
+    @classmethod
+    def connect(cls, address=INFERENCE_SERVER_ADDRESS):
+        """Returns: a RemoteModel, or None if no server is listening at `address`"""
+        sock = socket.socket(_socket_family(address), socket.SOCK_STREAM)
+        sock.settimeout(SERVER_CONNECT_TIMEOUT_S)
+        try:
+            sock.connect(address)
+            model = cls(sock)
+        except (OSError, ConnectionError):
+            sock.close()
+            return None
+        # Keep a read timeout, so a stuck server makes predict() fail instead of hanging the UI
+        sock.settimeout(SERVER_READ_TIMEOUT_S)
+        if sock.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return model
+
+    def predict(self, landmarks, verbose=0):
+        """Raises ConnectionError if the server went away or didn't answer in time"""
+        rows = np.ascontiguousarray(landmarks, dtype=np.float32).reshape(-1, N_FEATURES)
+        try:
+            self.sock.sendall(COUNT.pack(len(rows)) + rows.tobytes())
+            data = _recv_exact(self.sock, len(rows) * self.n_classes * 4)
+        except OSError as e:
+            self.sock.close()
+            raise ConnectionError(str(e) or type(e).__name__)
+        return np.frombuffer(data, dtype=np.float32).reshape(len(rows), self.n_classes)
+
+    def close(self):
+        self.sock.close()
+
+
+class _Request:
+    __slots__ = ("rows", "done", "result", "error")
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceServer:
+    """
+    Hosts a single copy of the classifier for every station on the machine.
+
+    Each client connection has its own thread, but all predictions go through one batcher thread
+    that waits at most `max_wait_ms` after the first pending request for others to arrive, then
+    runs them together in a single predict call.
+    """
+
+    def __init__(self, model, address=INFERENCE_SERVER_ADDRESS,
+                 max_batch=SERVER_MAX_BATCH, max_wait_ms=SERVER_MAX_WAIT_MS):
+        self.model = model
+        self.address = address
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+        self.n_classes = int(model.output_shape[-1])
+        self.requests = queue.Queue()
+        self.running = True
+
+        # Statistics
+        self.batches = 0
+        self.rows = 0
+
+    def serve_forever(self):
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)  # stale socket file from a previous run
+        server = socket.socket(_socket_family(self.address), socket.SOCK_STREAM)
+        if server.family == socket.AF_INET:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(self.address)
+        server.listen()
+
+        threading.Thread(target=self._batch_loop, daemon=True).start()
+        logger.info("Listening on %s", self.address)
+        try:
+            while self.running:
+                conn, _ = server.accept()
+                threading.Thread(target=self._serve_client, args=(conn,), daemon=True).start()
+        finally:
+            self.running = False
+            server.close()
+            if self.batches:
+                logger.info("Served %d predictions in %d batches (avg batch %.1f)",
+                            self.rows, self.batches, self.rows / self.batches)
+
+    def _serve_client(self, conn):
+        if conn.family == socket.AF_INET:
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        try:
+            conn.sendall(COUNT.pack(self.n_classes))
+            while self.running:
+                n = COUNT.unpack(_recv_exact(conn, COUNT.size))[0]
+                if n == 0:
+                    continue
+                rows = np.frombuffer(_recv_exact(conn, n * N_FEATURES * 4), dtype=np.float32)
+                request = _Request(rows.reshape(n, N_FEATURES))
+                self.requests.put(request)
+                request.done.wait()
+                if request.error is not None:
+                    break  # closing the connection makes the client fall back to its own model
+                conn.sendall(request.result.tobytes())
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _batch_loop(self):
+        while self.running:
+            batch = [self.requests.get()]
+            n_rows = len(batch[0].rows)
+
+            # Gather more requests until the batch is full or the latency budget is spent
+            deadline = time.monotonic() + self.max_wait_s
+            while n_rows < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                n_rows += len(request.rows)
+
+            try:
+                probabilities = np.asarray(
+                    self.model.predict_on_batch(np.concatenate([r.rows for r in batch])), dtype=np.float32
+                )
+            except Exception as e:
+                # Fail this batch only; the waiting clients must not block forever
+                logger.exception("Prediction failed for a batch of %d rows", n_rows)
+                for request in batch:
+                    request.error = e
+                    request.done.set()
+                continue
+            self.batches += 1
+            self.rows += n_rows
+
+            start = 0
+            for request in batch:
+                request.result = probabilities[start:start + len(request.rows)]
+                start += len(request.rows)
+                request.done.set()
+
+
+def _parse_address(args):
+    """--unix or --host/--port override the address from config"""
+    if args.unix:
+        return args.unix
+    if args.host or args.port:
+        return args.host or "127.0.0.1", args.port or 50631
+    return INFERENCE_SERVER_ADDRESS
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the ASL letter classifier to local stations")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=SERVER_MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
+    os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+    if MODEL_REGISTRY:
+        from models.model_registry import ModelRegistry
+        model = ModelRegistry(MODEL_PATH)
+    else:
+        import tensorflow as tf
+        model = tf.keras.models.load_model(MODEL_PATH)
+
+    InferenceServer(model, _parse_address(args), args.max_batch, args.max_wait_ms).serve_forever()
@@ -0,0 +1,242 @@
+import logging
+import multiprocessing as mp
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from config import WORKER_FRAME_SLOTS, WORKER_START_TIMEOUT_S, WORKER_STOP_TIMEOUT_S
+from utils.learner_profile import current_learner, set_learner
+
+# What the worker sends back for each frame; the frame itself stays in shared memory
+WorkerResult = namedtuple("WorkerResult", ["landmarks", "letter", "confidence", "probabilities"])
+EMPTY_RESULT = WorkerResult(None, None, 0.0, None)
+
+# Slot states of the shared-memory ring buffer
+FREE, BUSY, READY = 0, 1, 2
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_main(conn, learner):
+    """Entry point of the worker process: owns the HandDetector and serves frames from shared memory"""
+    # Imported here so that only the worker process pays for TensorFlow and MediaPipe
+    from models.hand_detector import HandDetector
+
+    # A spawned process starts with the default learner, the profile files are the UI's learner's
+    set_learner(learner)
+    detector = HandDetector()
+    conn.send(("ready", detector.letters, detector.class_names))
+
+    shm = None
+    frames = None
+    try:
+        while True:
+            try:
+                message = conn.recv()
+            except EOFError:
+                break  # the UI process went away
+
+            if message[0] == "attach":
+                _, name, shape = message
+                if shm:
+                    shm.close()
+                shm = shared_memory.SharedMemory(name=name)
+                frames = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+            elif message[0] == "process":
+                slot = message[1]
+                _, results = detector.process_frame(frames[slot])
+                landmarks = detector.extract_landmarks(results)
+                if landmarks is None:
+                    conn.send(("done", slot, EMPTY_RESULT))
+                    continue
+                probabilities = detector.predict_probabilities(landmarks)
+                letter, confidence = detector.predict_letter(landmarks, probabilities)
+                conn.send(("done", slot, WorkerResult(landmarks, letter, float(confidence), probabilities)))
+            elif message[0] == "confirm":
+                detector.confirm_letter(message[1])
+            elif message[0] == "learner":
+                set_learner(message[1])
+                detector.load_learner()
+            elif message[0] == "close":
+                break
+    finally:
+        frames = None
+        if shm:
+            shm.close()
+        detector.close()
+
+
+class InferenceWorker:
+    """
+    Runs HandDetector in a separate process so TensorFlow and MediaPipe don't compete with the
+    Tk UI for the GIL. Frames are written into a ring of shared-memory slots and only the slot
+    index crosses the pipe; each result arrives about one frame later. It has the same interface
+    as HandDetector, so the screens can use either one. If the worker dies, detection falls back
+    to a HandDetector in this process.
+    """
+
+    def __init__(self, slots=WORKER_FRAME_SLOTS):
+        self.slots = slots
+        self.shm = None
+        self.frames = None
+        self.state = [FREE] * slots
+        self.next_slot = 0
+        self.ready_slot = None
+        self.result = EMPTY_RESULT
+        self.fresh = False  # whether the last process_frame() returned a new result
+        self.local = None  # in-process HandDetector once the worker is gone
+
+        context = mp.get_context("spawn")  # forking a process that runs Tk and TensorFlow is unsafe
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, current_learner()), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+        # Wait for the worker to load its models
+        try:
+            if not self.conn.poll(WORKER_START_TIMEOUT_S):
+                raise EOFError
+            _, self.letters, self.class_names = self.conn.recv()
+        except EOFError:
+            self.close()
+            raise RuntimeError("Inference worker did not start")
+
+    def _attach(self, shape):
+        """(Re)allocate the ring buffer for frames of the given shape"""
+        # Let frames in flight finish before the old buffer goes away
+        try:
+            while BUSY in self.state:
+                self._receive()
+        except (EOFError, OSError) as e:
+            self._fall_back(e)
+            return
+        self._release_buffer()
+        ring_shape = (self.slots,) + shape
+        self.shm = shared_memory.SharedMemory(create=True, size=int(np.prod(ring_shape)))
+        self.frames = np.ndarray(ring_shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.state = [FREE] * self.slots
+        self.ready_slot = None
+        self._send(("attach", self.shm.name, ring_shape))
+
+    def _send(self, message):
+        try:
+            self.conn.send(message)
+        except (BrokenPipeError, OSError) as e:
+            self._fall_back(e)
+
+    def _fall_back(self, error):
+        """Stop using the worker process and detect in this process from now on"""
+        if self.local is not None:
+            return
+        logger.warning("Inference worker lost (%s), detecting in process", error)
+        from models.hand_detector import HandDetector
+        self.local = HandDetector()
+        self._stop_worker()
+
+    def _receive(self):
+        """Wait for the next finished frame and make it the one to display"""
+        _, slot, result = self.conn.recv()
+        if self.ready_slot is not None:
+            self.state[self.ready_slot] = FREE
+        self.state[slot] = READY
+        self.ready_slot = slot
+        self.result = result
+
+    def _collect(self):
+        """Pick up every result the worker has finished, without blocking"""
+        try:
+            while self.conn.poll():
+                self._receive()
+        except (EOFError, OSError) as e:
+            self._fall_back(e)
+
+    def process_frame(self, frame):
+        """Returns: (processed_frame, results) for the most recent frame the worker has finished"""
+        if self.local is None and (self.frames is None or self.frames.shape[1:] != frame.shape):
+            self._attach(frame.shape)
+        if self.local is None:
+            self._collect()
+        if self.local is not None:
+            return self.local.process_frame(frame)
+
+        # Hand the frame to the worker if a slot is free, otherwise drop it
+        for _ in range(self.slots):
+            slot = self.next_slot
+            self.next_slot = (self.next_slot + 1) % self.slots
+            if self.state[slot] == FREE:
+                self.frames[slot] = frame
+                self.state[slot] = BUSY
+                self._send(("process", slot))
+                break
+
+        if self.local is not None:
+            return self.local.process_frame(frame)
+        if self.ready_slot is None:
+            # Nothing new from the worker: show the live frame and keep the last hand, but
+            # don't report its prediction a second time
+            self.fresh = False
+            return frame, self.result
+
+        # Each finished frame is handed out once, then its slot takes new frames again
+        slot, self.ready_slot = self.ready_slot, None
+        self.state[slot] = FREE
+        self.fresh = True
+        return self.frames[slot].copy(), self.result
+
+    def extract_landmarks(self, results):
+        """ Returns: landmarks computed by the worker, or None if no right hand was detected """
+        if self.local is not None:
+            return self.local.extract_landmarks(results)
+        return results.landmarks
+
+    def predict_letter(self, landmarks, probabilities=None):
+        """ Returns: the worker's prediction for the frame returned by the last process_frame() """
+        if self.local is not None:
+            return self.local.predict_letter(landmarks, probabilities)
+        if landmarks is None or not self.fresh:
+            return None, 0.0
+        return self.result.letter, self.result.confidence
+
+    def predict_probabilities(self, landmarks):
+        if self.local is not None:
+            return self.local.predict_probabilities(landmarks)
+        return self.result.probabilities
+
+    def confirm_letter(self, letter):
+        if self.local is not None:
+            self.local.confirm_letter(letter)
+        else:
+            self._send(("confirm", letter))
+
+    def load_learner(self):
+        if self.local is not None:
+            self.local.load_learner()
+        else:
+            self._send(("learner", current_learner()))
+
+    def _release_buffer(self):
+        if self.shm:
+            self.frames = None
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    def close(self):
+        """Stop the worker process (or the in-process fallback) and free the shared memory"""
+        self._stop_worker()
+        if self.local is not None:
+            self.local.close()
+
+    def _stop_worker(self):
+        if self.process.is_alive():
+            try:
+                self.conn.send(("close",))
+            except (BrokenPipeError, OSError):
+                pass
+            self.process.join(WORKER_STOP_TIMEOUT_S)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join()
+        self.conn.close()
+        self._release_buffer()
@@ -0,0 +1,164 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+from config import (MODEL_PATH, SHADOW_MODEL_PATH, SHADOW_SAMPLE_RATE, SHADOW_QUEUE_SIZE, SHADOW_LOG_PATH,
+                    REGISTRY_POLL_S, ASL_CLASS_NAMES)
+
+N_FEATURES = 63
+
+logger = logging.getLogger(__name__)
+
+
+def load_keras_model(path):
+    """Load a Keras model and run one prediction so its first real call isn't slow"""
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(path)
+    model.predict(np.zeros((1, N_FEATURES), dtype=np.float32), verbose=0)
+    return model
+
+
+class ModelRegistry:
+    """
+    Serves the live classifier and lets it be replaced without restarting the app.
+
+    New versions are loaded and warmed up on a background thread, then swapped in with a single
+    reference assignment, so predict() never waits for a load. A candidate can also run in shadow:
+    a sampled fraction of the frames is queued to a background thread that runs the candidate
+    and logs its agreement and latency against the primary. When that queue is full the sample
+    is dropped, so the shadow never slows down the UI.
+    It has the same predict() call as a Keras model, so HandDetector can use it directly.
+    """
+
+    def __init__(self, path=MODEL_PATH, loader=load_keras_model):
+        self.loader = loader
+        self.primary = loader(path)
+        self.primary_path = path
+        self.watched_path = path  # the configured primary file, still watched after a promotion
+        self.shadow = None
+        self.shadow_path = None
+        self.shadow_queue = queue.Queue(maxsize=SHADOW_QUEUE_SIZE)
+        self.running = True
+
+        # Shadow statistics
+        self.shadow_samples = 0
+        self.shadow_agreements = 0
+        self.shadow_dropped = 0
+
+        # Watch the model files so that replacing them on disk swaps the model in
+        self._mtimes = {path: self._mtime(path), SHADOW_MODEL_PATH: None}
+        threading.Thread(target=self._watch_loop, daemon=True).start()
+        threading.Thread(target=self._shadow_loop, daemon=True).start()
+
+    @property
+    def output_shape(self):
+        return self.primary.output_shape
+
+    def predict(self, landmarks, verbose=0):
+        model = self.primary  # read once, a swap in the middle of the call can't mix versions
+        start = time.perf_counter()
+        probabilities = model.predict(landmarks, verbose=0)
+        latency = time.perf_counter() - start
+
+        if self.shadow is not None and random.random() < SHADOW_SAMPLE_RATE:
+            try:
+                self.shadow_queue.put_nowait((landmarks, probabilities, latency))
+            except queue.Full:
+                self.shadow_dropped += 1
+        return probabilities
+
+    def predict_on_batch(self, landmarks):
+        return self.predict(landmarks)
+
+    def load_async(self, path, shadow=False):
+        """Load the model at `path` in the background, then make it the primary or the shadow"""
+        threading.Thread(target=self._load, args=(path, shadow), daemon=True).start()
+
+    def _load(self, path, shadow):
+        self._mtimes[path] = self._mtime(path)
+        try:
+            model = self.loader(path)
+        except Exception as e:
+            logger.error("Could not load %s: %s", path, e)
+            return
+
+        if shadow:
+            self.shadow, self.shadow_path = model, path
+            self.shadow_samples = self.shadow_agreements = self.shadow_dropped = 0
+            logger.info("Running %s in shadow", path)
+        else:
+            self.primary, self.primary_path = model, path
+            logger.info("Switched to %s", path)
+
+    def promote_shadow(self):
+        """Make the shadow model the primary one"""
+        if self.shadow is not None:
+            self.primary, self.primary_path = self.shadow, self.shadow_path
+            self.shadow, self.shadow_path = None, None
+            logger.info("Promoted %s", self.primary_path)
+
+    def _shadow_loop(self):
+        while self.running:
+            try:
+                landmarks, primary_probabilities, primary_latency = self.shadow_queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            shadow = self.shadow
+            if shadow is None:
+                continue
+
+            start = time.perf_counter()
+            shadow_probabilities = shadow.predict(landmarks, verbose=0)
+            shadow_latency = time.perf_counter() - start
+
+            # One row per landmark vector (batches come from the inference server)
+            for primary_row, shadow_row in zip(primary_probabilities, shadow_probabilities):
+                primary_letter = ASL_CLASS_NAMES[int(np.argmax(primary_row))]
+                shadow_letter = ASL_CLASS_NAMES[int(np.argmax(shadow_row))]
+                self.shadow_samples += 1
+                self.shadow_agreements += primary_letter == shadow_letter
+                self._log_shadow(primary_letter, shadow_letter, primary_latency, shadow_latency)
+
+    def _log_shadow(self, primary_letter, shadow_letter, primary_latency, shadow_latency):
+        new_file = not os.path.exists(SHADOW_LOG_PATH)
+        with open(SHADOW_LOG_PATH, "a") as f:
+            if new_file:
+                f.write("timestamp,primary,shadow,agree,primary_ms,shadow_ms\n")
+            f.write(f"{time.time():.3f},{primary_letter},{shadow_letter},{int(primary_letter == shadow_letter)},"
+                    f"{primary_latency * 1000:.2f},{shadow_latency * 1000:.2f}\n")
+
+        if self.shadow_samples % 100 == 0:
+            logger.info("Shadow agreement %.1f%% over %d samples (%d dropped)",
+                        self.shadow_report()["agreement"] * 100, self.shadow_samples, self.shadow_dropped)
+
+    def shadow_report(self):
+        return {
+            "shadow": self.shadow_path,
+            "samples": self.shadow_samples,
+            "agreement": self.shadow_agreements / self.shadow_samples if self.shadow_samples else 0.0,
+            "dropped": self.shadow_dropped,
+        }
+
+    @staticmethod
+    def _mtime(path):
+        return os.path.getmtime(path) if os.path.exists(path) else None
+
+    def _watch_loop(self):
+        """Hot-swap MODEL_PATH when the file is replaced, shadow SHADOW_MODEL_PATH when it appears"""
+        while self.running:
+            time.sleep(REGISTRY_POLL_S)
+            # The configured files, not primary_path, which is the shadow file after a promotion
+            for path, shadow in ((self.watched_path, False), (SHADOW_MODEL_PATH, True)):
+                mtime = self._mtime(path)
+                if mtime is not None and mtime != self._mtimes.get(path):
+                    self._mtimes[path] = mtime
+                    self._load(path, shadow)
+
+    def close(self):
+        self.running = False
@@ -0,0 +1,97 @@
+import logging
+
+import cv2
+import numpy as np
+
+from config import MOTION_GATE_THUMBNAIL, MOTION_GATE_PIXEL_THRESHOLD, MOTION_GATE_CHANGED_FRACTION, \
+    MOTION_GATE_MAX_SKIP
+from models.inference_worker import InferenceWorker
+
+logger = logging.getLogger(__name__)
+
+
+class MotionGate:
+    """
+    Skips detection on frames that barely differ from the last processed one.
+
+    Each frame is shrunk to a small grayscale thumbnail and compared with the thumbnail of the
+    last frame that went through the detector. When few enough pixels changed, the previous
+    results, landmarks and probabilities are returned instead of running MediaPipe and the model
+    again. predict_letter() is still forwarded on every frame, so the J/Z sequence recognizer
+    keeps stepping at the camera rate. Any real movement is detected on the frame where it
+    happens, so transitions are not delayed, and a full detection is forced every
+    MOTION_GATE_MAX_SKIP frames regardless. It has the same interface as HandDetector and wraps
+    either it or an InferenceWorker.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self.reference = None  # thumbnail of the last processed frame
+        self.skipped_in_row = 0
+        self.reused = False  # whether the current frame reuses the previous detection
+
+        # Detection of the last processed frame
+        self.results = None
+        self.landmarks = None
+        self.probabilities = None
+
+        self.frames = 0
+        self.skipped = 0
+
+    def __getattr__(self, name):
+        # letters, class_names, confirm_letter, ... come from the wrapped detector
+        if name == "detector":
+            raise AttributeError(name)
+        return getattr(self.detector, name)
+
+    def _is_static(self, thumbnail):
+        if self.reference is None or self.skipped_in_row >= MOTION_GATE_MAX_SKIP:
+            return False
+        changed = np.count_nonzero(cv2.absdiff(thumbnail, self.reference) > MOTION_GATE_PIXEL_THRESHOLD)
+        return changed <= MOTION_GATE_CHANGED_FRACTION * thumbnail.size
+
+    def process_frame(self, frame):
+        self.frames += 1
+        thumbnail = cv2.cvtColor(cv2.resize(frame, MOTION_GATE_THUMBNAIL, interpolation=cv2.INTER_AREA),
+                                 cv2.COLOR_BGR2GRAY)
+        self.reused = self._is_static(thumbnail)
+        if self.reused:
+            self.skipped += 1
+            self.skipped_in_row += 1
+            if isinstance(self.detector, InferenceWorker):
+                # The worker saw no new frame, so its last prediction must not be reported again
+                self.detector.fresh = False
+            return frame, self.results
+
+        self.reference = thumbnail
+        self.skipped_in_row = 0
+        frame, self.results = self.detector.process_frame(frame)
+        self.landmarks = None
+        self.probabilities = None
+        return frame, self.results
+
+    def extract_landmarks(self, results):
+        if not self.reused:
+            self.landmarks = self.detector.extract_landmarks(results)
+        return self.landmarks
+
+    def predict_probabilities(self, landmarks):
+        if not self.reused or self.probabilities is None:
+            self.probabilities = self.detector.predict_probabilities(landmarks)
+        return self.probabilities
+
+    def predict_letter(self, landmarks, probabilities=None):
+        # With the cached probabilities this only steps the sequence recognizer, no model call
+        if probabilities is None and self.reused:
+            probabilities = self.probabilities
+        return self.detector.predict_letter(landmarks, probabilities)
+
+    @property
+    def skip_rate(self):
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def close(self):
+        if self.frames:
+            logger.info("Motion gate: reused the previous detection on %.0f%% of %d frames",
+                        self.skip_rate * 100, self.frames)
+        self.detector.close()
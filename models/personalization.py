@@ -0,0 +1,140 @@
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config import (ASL_CLASS_NAMES, PERSONALIZATION_SAMPLES_PER_LETTER, PERSONALIZATION_FRAMES_PER_CONFIRM,
+                    PERSONALIZATION_MIN_NEW_SAMPLES, PERSONALIZATION_EPOCHS, PERSONALIZATION_LEARNING_RATE,
+                    PERSONALIZATION_L2, PERSONALIZATION_CPU_SHARE)
+
+
+def _softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+class PersonalizedModel:
+    """
+    Wraps the shipped Keras model with a per-user copy of its output layer.
+
+    The base network up to the penultimate layer is left untouched and turns landmarks into
+    features; the learner's own softmax head is fitted on those features in a background thread,
+    starting from and regularized towards the shipped weights, and swapped in when done.
+    Training sleeps between epochs so that it uses at most PERSONALIZATION_CPU_SHARE of a core.
+    It has the same predict() call as a Keras model, so HandDetector can use it directly.
+    """
+
+    def __init__(self, base_model, adapter_path):
+        import tensorflow as tf
+
+        self.features = tf.keras.Model(base_model.inputs, base_model.layers[-2].output)
+        kernel, bias = base_model.layers[-1].get_weights()
+        self.base_head = (kernel, bias)
+        self.head = (kernel.copy(), bias.copy())
+        self.output_shape = base_model.output_shape
+        self.adapter_path = adapter_path
+
+        # Labeled feature vectors per letter, only the most recent ones are kept
+        self.samples = {i: deque(maxlen=PERSONALIZATION_SAMPLES_PER_LETTER) for i in range(len(ASL_CLASS_NAMES))}
+        # (features, two most likely classes) of the latest frames
+        self.recent = deque(maxlen=PERSONALIZATION_FRAMES_PER_CONFIRM)
+        self.lock = threading.Lock()  # guards samples, written by the UI thread and read by the trainer
+        self.new_samples = 0
+        self.training = False
+        self._load()
+
+    def predict(self, landmarks, verbose=0):
+        features = self.features(landmarks, training=False).numpy()
+        kernel, bias = self.head  # read once, the trainer may swap in a new head at any time
+        probabilities = _softmax(features @ kernel + bias)
+        self.recent.extend(zip(features, np.argsort(probabilities, axis=1)[:, -2:]))
+        return probabilities
+
+    def confirm(self, letter):
+        """
+        The learner just signed `letter` correctly: label the latest frames with it. Frames where
+        it isn't among the two most likely letters are left out, they are usually the transition
+        from the previous sign rather than the letter itself.
+        """
+        if letter not in ASL_CLASS_NAMES:
+            return
+        index = ASL_CLASS_NAMES.index(letter)
+        confirmed = [features for features, top in self.recent if index in top]
+        self.recent.clear()
+        if not confirmed:
+            return
+        with self.lock:
+            self.samples[index].extend(confirmed)
+        self.new_samples += len(confirmed)
+
+        if self.new_samples >= PERSONALIZATION_MIN_NEW_SAMPLES and not self.training:
+            self.training = True
+            self.new_samples = 0
+            threading.Thread(target=self._train, daemon=True).start()
+
+    def _labeled_samples(self):
+        """Returns: (features, labels) arrays of all collected samples"""
+        with self.lock:
+            pairs = [(f, i) for i, samples in self.samples.items() for f in samples]
+        features = np.array([f for f, _ in pairs], dtype=np.float32)
+        return features.reshape(len(pairs), -1), np.array([i for _, i in pairs], dtype=np.int32)
+
+    def _train(self):
+        adapter_path = self.adapter_path
+        try:
+            X, y = self._labeled_samples()
+            targets = np.eye(len(ASL_CLASS_NAMES), dtype=np.float32)[y]
+            base_kernel, base_bias = self.base_head
+            kernel, bias = (w.copy() for w in self.head)
+
+            for _ in range(PERSONALIZATION_EPOCHS):
+                start = time.perf_counter()
+                # Cross-entropy gradient, with an L2 pull back towards the shipped weights
+                error = (_softmax(X @ kernel + bias) - targets) / len(X)
+                kernel -= PERSONALIZATION_LEARNING_RATE * (X.T @ error + PERSONALIZATION_L2 * (kernel - base_kernel))
+                bias -= PERSONALIZATION_LEARNING_RATE * (error.sum(axis=0) + PERSONALIZATION_L2 * (bias - base_bias))
+                # Idle long enough to stay within the CPU share
+                time.sleep((time.perf_counter() - start) * (1 / PERSONALIZATION_CPU_SHARE - 1))
+
+            # A head fitted for the previous learner is dropped
+            if adapter_path == self.adapter_path:
+                self.head = (kernel, bias)
+                self._save()
+        finally:
+            self.training = False
+
+    def _load(self):
+        """Restore the learner's head and samples from their profile"""
+        if not os.path.exists(self.adapter_path):
+            return
+        adapter = np.load(self.adapter_path)
+        self.head = (adapter["kernel"], adapter["bias"])
+        for feature, label in zip(adapter["features"], adapter["labels"]):
+            self.samples[int(label)].append(feature)
+
+    def _save(self):
+        features, labels = self._labeled_samples()
+        kernel, bias = self.head
+        np.savez(self.adapter_path, kernel=kernel, bias=bias, features=features, labels=labels)
+
+    def switch_adapter(self, adapter_path):
+        """Start again from the shipped output layer with another learner's adapter"""
+        self.head = tuple(w.copy() for w in self.base_head)
+        with self.lock:
+            for samples in self.samples.values():
+                samples.clear()
+        self.recent.clear()
+        self.new_samples = 0
+        self.adapter_path = adapter_path
+        self._load()
+
+    def reset(self):
+        """Go back to the shipped output layer and forget the learner's samples"""
+        self.head = tuple(w.copy() for w in self.base_head)
+        with self.lock:
+            for samples in self.samples.values():
+                samples.clear()
+        if os.path.exists(self.adapter_path):
+            os.remove(self.adapter_path)
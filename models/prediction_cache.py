@@ -0,0 +1,100 @@
+import json
+import logging
+import random
+from collections import OrderedDict
+
+import numpy as np
+
+from config import (PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TOLERANCE, PREDICTION_CACHE_PROJECTIONS,
+                    PREDICTION_CACHE_AUDIT_RATE, PREDICTION_CACHE_STATS_PATH)
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """
+    LRU cache of model outputs keyed by a quantized hand pose.
+
+    The key is a locality-sensitive hash of the pose: the landmarks relative to the wrist and
+    scaled by the hand size are projected on a few fixed random directions, and each projection
+    is rounded to a grid of `tolerance` (a fraction of the hand size). Near-identical poses of a
+    held sign share an entry. Quantizing all 63 coordinates instead would almost never match,
+    since landmark jitter moves one of them across a grid line on nearly every frame.
+    A fraction of the hits is audited: the model runs anyway and the cached answer is compared
+    with the fresh one, which gives the agreement and probability drift the cache causes.
+    """
+
+    def __init__(self, capacity=PREDICTION_CACHE_SIZE, tolerance=PREDICTION_CACHE_TOLERANCE,
+                 projections=PREDICTION_CACHE_PROJECTIONS, audit_rate=PREDICTION_CACHE_AUDIT_RATE):
+        self.capacity = capacity
+        self.tolerance = tolerance
+        # Fixed seed, so the same pose gets the same key in every process and run
+        directions = np.random.default_rng(0).normal(size=(63, projections))
+        self.directions = (directions / np.linalg.norm(directions, axis=0)).astype(np.float32)
+        self.audit_rate = audit_rate
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.audits = 0
+        self.audit_agreements = 0
+        self.max_drift = 0.0  # largest probability difference seen in an audit
+
+    def signature(self, landmarks):
+        """Returns: hashable key of the pose, equal for poses within the tolerance grid"""
+        points = np.asarray(landmarks, dtype=np.float32).reshape(21, 3)
+        relative = points - points[0]
+        scale = float(np.max(np.abs(relative[:, :2]))) or 1.0
+        projected = relative.reshape(-1) @ self.directions / scale
+        return np.floor(projected / self.tolerance).astype(np.int16).tobytes()
+
+    def get(self, key):
+        probabilities = self.entries.get(key)
+        if probabilities is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return probabilities
+
+    def put(self, key, probabilities):
+        self.entries[key] = probabilities
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def should_audit(self):
+        return random.random() < self.audit_rate
+
+    def audit(self, key, cached, fresh):
+        """Compare a cached answer with the model's and replace it with the fresh one"""
+        self.entries[key] = fresh
+        self.audits += 1
+        self.audit_agreements += int(np.argmax(cached) == np.argmax(fresh))
+        self.max_drift = max(self.max_drift, float(np.max(np.abs(np.asarray(cached) - np.asarray(fresh)))))
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "lookups": lookups,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "audits": self.audits,
+            "audit_agreement": self.audit_agreements / self.audits if self.audits else 1.0,
+            "max_drift": self.max_drift,
+            "tolerance": self.tolerance,
+        }
+
+    def export_stats(self, path=PREDICTION_CACHE_STATS_PATH):
+        stats = self.stats()
+        with open(path, "w") as f:
+            json.dump(stats, f, indent=2)
+        logger.info("Prediction cache: %.1f%% hits over %d lookups, %.1f%% agreement in %d audits",
+                    stats['hit_rate'] * 100, stats['lookups'], stats['audit_agreement'] * 100, stats['audits'])
+        return stats
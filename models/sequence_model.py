@@ -0,0 +1,121 @@
+import numpy as np
+
+from config import ASL_MOTION_CLASS_NAMES, SEQUENCE_CLASS_NAMES, SEQUENCE_MIN_FRAMES, SEQUENCE_CONFIDENCE
+
+N_LANDMARK_VALUES = 63
+N_FEATURES = 2 * N_LANDMARK_VALUES  # wrist-relative pose + per-frame velocity
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+class StreamingSequenceRecognizer:
+    """
+    Streaming recognizer for the motion letters (J and Z).
+
+    The network is a causal Conv1D -> GRU -> Dense stack. Instead of reprocessing a whole
+    window every frame, the conv layer reads only the last `kernel_size` frames from a ring
+    buffer and the GRU carries its hidden state, so each update costs the same small amount.
+    """
+
+    def __init__(self, weights_path):
+        weights = np.load(weights_path)
+        self.conv_kernel = weights["conv_kernel"].astype(np.float32)  # (K, features, filters)
+        self.conv_bias = weights["conv_bias"].astype(np.float32)
+        self.gru_kernel = weights["gru_kernel"].astype(np.float32)  # (filters, 3 * hidden)
+        self.gru_recurrent = weights["gru_recurrent"].astype(np.float32)  # (hidden, 3 * hidden)
+        self.gru_bias = weights["gru_bias"].astype(np.float32)  # (2, 3 * hidden), reset_after
+        self.dense_kernel = weights["dense_kernel"].astype(np.float32)
+        self.dense_bias = weights["dense_bias"].astype(np.float32)
+        self.class_names = SEQUENCE_CLASS_NAMES
+
+        self.kernel_size = self.conv_kernel.shape[0]
+        self.hidden_size = self.gru_recurrent.shape[0]
+
+        # Fixed-size ring buffer of the most recent feature frames
+        self.buffer = np.zeros((self.kernel_size, N_FEATURES), dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Clear the buffered frames and the recurrent state (e.g. when the hand is lost)"""
+        self.buffer[:] = 0.0
+        self.head = 0  # index of the oldest frame in the ring buffer
+        self.frames_seen = 0
+        self.previous = None
+        self.state = np.zeros(self.hidden_size, dtype=np.float32)
+
+    def _frame_features(self, landmarks):
+        """Wrist-relative pose plus velocity against the previous frame"""
+        coords = np.asarray(landmarks, dtype=np.float32).reshape(-1)
+        relative = (coords.reshape(21, 3) - coords[:3]).reshape(-1)
+        velocity = coords - self.previous if self.previous is not None else np.zeros_like(coords)
+        self.previous = coords
+        return np.concatenate([relative, velocity])
+
+    def _gru_step(self, x):
+        hidden = self.hidden_size
+        x_proj = x @ self.gru_kernel + self.gru_bias[0]
+        h_proj = self.state @ self.gru_recurrent + self.gru_bias[1]
+
+        z = _sigmoid(x_proj[:hidden] + h_proj[:hidden])
+        r = _sigmoid(x_proj[hidden:2 * hidden] + h_proj[hidden:2 * hidden])
+        candidate = np.tanh(x_proj[2 * hidden:] + r * h_proj[2 * hidden:])
+        self.state = z * self.state + (1.0 - z) * candidate
+
+    def update(self, landmarks):
+        """
+        Push one frame of landmarks and advance the network by one step.
+
+        Returns:
+            str: Motion letter, or None when no motion letter is recognized
+            float: Confidence score
+        """
+        # Overwrite the oldest slot, then read the window back in time order
+        self.buffer[self.head] = self._frame_features(landmarks)
+        self.head = (self.head + 1) % self.kernel_size
+        self.frames_seen += 1
+        window = np.roll(self.buffer, -self.head, axis=0)
+
+        conv = np.einsum("kf,kfc->c", window, self.conv_kernel) + self.conv_bias
+        self._gru_step(np.maximum(conv, 0.0))
+
+        logits = self.state @ self.dense_kernel + self.dense_bias
+        probabilities = np.exp(logits - logits.max())
+        probabilities /= probabilities.sum()
+
+        best = int(np.argmax(probabilities))
+        letter = self.class_names[best]
+        confidence = float(probabilities[best])
+        if self.frames_seen < SEQUENCE_MIN_FRAMES or letter not in ASL_MOTION_CLASS_NAMES \
+                or confidence < SEQUENCE_CONFIDENCE:
+            return None, confidence
+        return letter, confidence
+
+
+def build_sequence_model(kernel_size=5, conv_filters=64, hidden_size=64):
+    """Keras model matching the streaming recognizer, trained on (batch, time, N_FEATURES) sequences"""
+    from tensorflow.keras import layers, Sequential
+
+    model = Sequential([
+        layers.InputLayer(shape=(None, N_FEATURES)),
+        layers.Conv1D(conv_filters, kernel_size, padding="causal", activation="relu"),
+        layers.GRU(hidden_size, return_sequences=True),
+        layers.Dense(len(SEQUENCE_CLASS_NAMES), activation="softmax")
+    ])
+    model.compile(optimizer="adam", loss="categorical_crossentropy", metrics=["accuracy"])
+    return model
+
+
+def export_sequence_weights(model, path):
+    """Save the weights of a model from build_sequence_model() in the format loaded above"""
+    conv, gru, dense = model.layers
+    conv_kernel, conv_bias = conv.get_weights()
+    gru_kernel, gru_recurrent, gru_bias = gru.get_weights()
+    dense_kernel, dense_bias = dense.get_weights()
+    np.savez(
+        path,
+        conv_kernel=conv_kernel, conv_bias=conv_bias,
+        gru_kernel=gru_kernel, gru_recurrent=gru_recurrent, gru_bias=gru_bias,
+        dense_kernel=dense_kernel, dense_bias=dense_bias
+    )
@@ -0,0 +1,138 @@
+import time
+from collections import deque, namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import cv2
+import numpy as np
+
+from config import FPS_WINDOW, MULTI_STREAM_WORKERS
+from models.hand_detector import HandDetector
+
+# Output of one tick for one stream; frame is None when the source had no new frame
+StreamOutput = namedtuple("StreamOutput", ["frame", "landmarks", "letter", "confidence"])
+
+
+class FpsCounter:
+    """Frames per second over the last `window` frames"""
+
+    def __init__(self, window=FPS_WINDOW):
+        self.times = deque(maxlen=window)
+
+    def tick(self):
+        self.times.append(time.perf_counter())
+
+    @property
+    def fps(self):
+        if len(self.times) < 2:
+            return 0.0
+        return (len(self.times) - 1) / (self.times[-1] - self.times[0])
+
+
+class VideoStream:
+    """One camera or video file with its own MediaPipe graph (tracking state is per stream)"""
+
+    def __init__(self, source, model):
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Could not open video source {source}")
+        self.is_file = isinstance(source, str)
+        self.detector = HandDetector(model=model)
+        self.fps_counter = FpsCounter()
+
+    def read_and_detect(self):
+        """Runs in the worker pool. Returns: (frame, landmarks) or None if no frame was read"""
+        success, frame = self.cap.read()
+        if not success:
+            if self.is_file:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)  # loop video files
+            return None
+
+        frame = cv2.flip(frame, 1)
+        frame, results = self.detector.process_frame(frame)
+        self.fps_counter.tick()
+        return frame, self.detector.extract_landmarks(results)
+
+    def close(self):
+        self.cap.release()
+        self.detector.close(close_model=False)  # the classifier is shared, the pipeline closes it
+
+
+class MultiStreamPipeline:
+    """
+    Runs hand detection for several video sources at once.
+
+    MediaPipe runs per stream in a thread pool (it releases the GIL while processing), then the
+    landmarks of every stream with a hand in view are classified together in one model call,
+    through the first stream's detector so the server fallback, cache and personalization apply.
+    A tick only picks up the streams whose detection has finished, so a slow source doesn't hold
+    back the others or the UI thread.
+    """
+
+    def __init__(self, sources, workers=MULTI_STREAM_WORKERS):
+        self.streams = []
+        model = None
+        try:
+            for source in sources:
+                stream = VideoStream(source, model)
+                model = stream.detector.model  # every stream shares the first stream's classifier
+                self.streams.append(stream)
+        except RuntimeError:
+            self.close()
+            raise
+        self.classifier = self.streams[0].detector
+        self.pool = ThreadPoolExecutor(max_workers=workers or len(self.streams))
+        self.pending = [None] * len(self.streams)  # detection running in the pool for each stream
+        self.tick_counter = FpsCounter()
+
+    def tick(self, timeout=0):
+        """
+        timeout: seconds to wait for at least one detection to finish, None to wait until one does
+        Returns: one StreamOutput per stream, empty for the streams still being processed
+        """
+        for i, stream in enumerate(self.streams):
+            if self.pending[i] is None:
+                self.pending[i] = self.pool.submit(stream.read_and_detect)
+        wait(self.pending, timeout, return_when=FIRST_COMPLETED)
+
+        detections = [None] * len(self.streams)
+        finished = [i for i, future in enumerate(self.pending) if future.done()]
+        for i in finished:
+            detections[i] = self.pending[i].result()
+            self.pending[i] = None
+
+        # Batch the landmarks of all streams that see a hand into a single prediction
+        with_hand = [i for i, d in enumerate(detections) if d is not None and d[1] is not None]
+        probabilities = {}
+        if with_hand:
+            batch = np.concatenate([detections[i][1] for i in with_hand])
+            probabilities = dict(zip(with_hand, self.classifier.predict_probabilities_batch(batch)))
+
+        outputs = []
+        for i, (stream, detection) in enumerate(zip(self.streams, detections)):
+            if detection is None:
+                outputs.append(StreamOutput(None, None, None, 0.0))
+                continue
+            frame, landmarks = detection
+            # Per-stream step so that each stream's motion model sees its own frames
+            letter, confidence = stream.detector.predict_letter(landmarks, probabilities.get(i))
+            outputs.append(StreamOutput(frame, landmarks, letter, confidence))
+
+        if finished:
+            self.tick_counter.tick()
+        return outputs
+
+    def stream_fps(self):
+        return [stream.fps_counter.fps for stream in self.streams]
+
+    def aggregate_fps(self):
+        """Total frames processed per second over all streams"""
+        return sum(self.stream_fps())
+
+    def close(self):
+        if hasattr(self, "pool"):
+            self.pool.shutdown(cancel_futures=True)
+        for stream in self.streams:
+            stream.close()
+        if self.streams:
+            self.streams[0].detector.close_model()  # the shared classifier, closed once
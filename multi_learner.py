@@ -0,0 +1,51 @@
+import argparse
+import os
+import time
+
+# Disable TensorFlow warnings
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+
+from config import MULTI_STREAM_SOURCES
+
+
+def parse_source(source):
+    """Camera indexes are given as numbers, anything else is a video file path"""
+    return int(source) if source.isdigit() else source
+
+
+def run_benchmark(sources, seconds):
+    """Process all sources without the UI and report per-stream and aggregate FPS"""
+    from models.stream_pool import MultiStreamPipeline
+
+    pipeline = MultiStreamPipeline(sources)
+    try:
+        start = last_report = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            pipeline.tick(timeout=None)
+            if time.perf_counter() - last_report >= 1.0:
+                last_report = time.perf_counter()
+                per_stream = ", ".join(f"{fps:.1f}" for fps in pipeline.stream_fps())
+                print(f"aggregate {pipeline.aggregate_fps():.1f} FPS | per stream [{per_stream}]")
+    finally:
+        pipeline.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one quiz per camera or video source")
+    parser.add_argument("sources", nargs="*", default=MULTI_STREAM_SOURCES,
+                        help="camera indexes or video file paths")
+    parser.add_argument("--benchmark", type=float, metavar="SECONDS",
+                        help="run headless for this many seconds and print FPS")
+    args = parser.parse_args()
+    sources = [parse_source(str(source)) for source in args.sources]
+
+    if args.benchmark:
+        run_benchmark(sources, args.benchmark)
+    else:
+        import customtkinter as ctk
+        from ui.multi_learner_app import MultiLearnerApp
+
+        ctk.set_appearance_mode("dark")
+        app = MultiLearnerApp(sources)
+        app.protocol("WM_DELETE_WINDOW", app.on_closing)
+        app.mainloop()
@@ -0,0 +1,65 @@
+"""The quiz and phrase screens feed the confusion matrix through their real prediction handlers"""
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("customtkinter")
+pytest.importorskip("cv2")
+pytest.importorskip("PIL")
+
+from ui.phrase_screen import PhraseScreen
+from ui.quiz_screen import QuizScreen
+from utils.confusion_matrix import ConfusionTracker
+from config import CONFUSION_STABLE_FRAMES
+
+
+def _widget():
+    return SimpleNamespace(configure=lambda **kwargs: None)
+
+
+def _app(tmp_path):
+    confusion = ConfusionTracker(str(tmp_path / "confusion.npy"))
+    return SimpleNamespace(
+        confusion=confusion,
+        difficulty="hard",
+        next_letter=lambda: None,
+        detector=SimpleNamespace(confirm_letter=lambda letter: None),
+        record_hard_example=lambda *args: None,
+        record_attempt=lambda *args: None,
+        record_prediction=confusion.observe,
+        record_correct=confusion.record_correct,
+    )
+
+
+def test_quiz_screen_counts_confusions_and_correct_answers(tmp_path):
+    app = _app(tmp_path)
+    screen = SimpleNamespace(
+        app=app, test_mode="video", target_letter="M", video_completed=False,
+        predicted_letter=_widget(), label_feedback=_widget(), predicted_image=_widget(),
+        update_video_error=lambda correct=False: None, after=lambda *args: None,
+    )
+
+    for _ in range(CONFUSION_STABLE_FRAMES):
+        QuizScreen.update_prediction(screen, "N")
+    QuizScreen.update_prediction(screen, "M")  # the question ends on the first correct frame
+    QuizScreen.update_prediction(screen, "M")  # ignored until the next letter
+
+    assert screen.video_completed
+    assert app.confusion.confused_pairs() == [("M", "N", 1)]
+    assert app.confusion.confusability(["M"])[0] == pytest.approx(0.5)
+
+
+def test_phrase_screen_counts_correct_letters(tmp_path):
+    app = _app(tmp_path)
+    screen = SimpleNamespace(
+        app=app, phrase="SA", current_index=0, timer=0, phrase_errors=0, letter_completed=False,
+        label_feedback=_widget(), after=lambda *args: None,
+    )
+
+    PhraseScreen._handle_prediction(screen, "A")
+    PhraseScreen._handle_prediction(screen, "S")
+
+    assert screen.letter_completed
+    assert screen.phrase_errors == 1
+    assert app.confusion.confusability(["S"])[0] == 0.0
+    assert app.confusion.counts.trace() == 1
@@ -0,0 +1,51 @@
+"""ConfusionTracker counting, without the UI dependencies of the screen tests"""
+import pytest
+
+from utils.confusion_matrix import ConfusionTracker
+from config import CONFUSION_STABLE_FRAMES
+
+
+def test_wrong_predictions_count_once_stable(tmp_path):
+    confusion = ConfusionTracker(str(tmp_path / "confusion.npy"))
+
+    for _ in range(CONFUSION_STABLE_FRAMES - 1):
+        confusion.observe("M", "N")
+    assert confusion.confused_pairs() == []
+
+    for _ in range(CONFUSION_STABLE_FRAMES + 3):
+        confusion.observe("M", "N")  # held longer, still one confusion
+    confusion.observe("M", "M")  # correct frames are left to record_correct()
+    assert confusion.confused_pairs() == [("M", "N", 1)]
+    assert confusion.counts.trace() == 0
+
+
+def test_correct_answers_fill_the_diagonal(tmp_path):
+    confusion = ConfusionTracker(str(tmp_path / "confusion.npy"))
+    for _ in range(CONFUSION_STABLE_FRAMES):
+        confusion.observe("M", "N")
+    confusion.record_correct("M")
+    confusion.record_correct("S")
+
+    assert confusion.confusability(["M", "S"]) == pytest.approx([0.5, 0.0])
+    assert confusion.partner("N") == "M"
+
+
+def test_record_correct_restarts_the_run(tmp_path):
+    confusion = ConfusionTracker(str(tmp_path / "confusion.npy"))
+    for _ in range(CONFUSION_STABLE_FRAMES - 1):
+        confusion.observe("A", "S")
+    confusion.record_correct("A")
+    confusion.observe("A", "S")
+
+    assert confusion.confused_pairs() == []
+
+
+def test_counts_survive_save_and_load(tmp_path):
+    path = str(tmp_path / "confusion.npy")
+    confusion = ConfusionTracker(path)
+    for _ in range(CONFUSION_STABLE_FRAMES):
+        confusion.observe("U", "V")
+    confusion.record_correct("U")
+    confusion.save()
+
+    assert (ConfusionTracker(path).counts == confusion.counts).all()
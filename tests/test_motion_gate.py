@@ -0,0 +1,39 @@
+"""MotionGate in front of an InferenceWorker reports each worker result once"""
+import numpy as np
+import pytest
+
+pytest.importorskip("cv2")
+
+from models.inference_worker import InferenceWorker, WorkerResult
+from models.motion_gate import MotionGate
+
+
+def _worker(result):
+    """An InferenceWorker whose process is replaced by a result ready on every processed frame"""
+    worker = InferenceWorker.__new__(InferenceWorker)
+    worker.local = None
+    worker.fresh = False
+    worker.result = result
+
+    def process_frame(frame):
+        worker.fresh = True
+        return frame, worker.result
+
+    worker.process_frame = process_frame
+    return worker
+
+
+def test_reused_frames_do_not_repeat_the_worker_prediction():
+    result = WorkerResult(np.zeros((1, 63)), "A", 0.9, np.ones(24) / 24)
+    gate = MotionGate(_worker(result))
+    frame = np.zeros((120, 160, 3), dtype=np.uint8)
+
+    predictions = []
+    for _ in range(3):  # the same frame again: the gate reuses the first detection
+        _, results = gate.process_frame(frame)
+        landmarks = gate.extract_landmarks(results)
+        probabilities = gate.predict_probabilities(landmarks)
+        predictions.append(gate.predict_letter(landmarks, probabilities))
+
+    assert gate.skipped == 2
+    assert predictions == [("A", 0.9), (None, 0.0), (None, 0.0)]
@@ -0,0 +1,305 @@
+"""
+Train the letter classifier and its alternatives in parallel and rank them by accuracy and serving cost.
+
+The landmark dataset (data_augmented.csv, exported by the training notebook) is loaded and split
+once in the parent process and placed in shared memory; every worker process maps the same
+arrays instead of receiving its own copy. Each variant trains single-threaded with early stopping,
+then its test accuracy, saved size and single-sample latency (the call the app makes per frame)
+are measured. The leaderboard is printed and written to TRAINING_RUNS_DIR/leaderboard.csv.
+
+    python train.py
+    python train.py --kinds mlp --workers 4 --deploy --max-latency-ms 5
+"""
+import argparse
+import csv
+import os
+import pickle
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context, shared_memory
+
+# Disable TensorFlow warnings
+os.environ['TF_ENABLE_ONEDNN_OPTS'] = '0'
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+
+import numpy as np
+
+from config import (MODEL_PATH, ASL_CLASS_NAMES, TRAINING_DATA_PATH, TRAINING_RUNS_DIR, TRAINING_TEST_SIZE,
+                    TRAINING_VALIDATION_SIZE, TRAINING_MAX_EPOCHS, TRAINING_PATIENCE, TRAINING_LATENCY_SAMPLES,
+                    TRAINING_SEED)
+
+# The notebook's network as (units, activation, dropout after the layer); the first layer is linear
+NOTEBOOK_LAYERS = ((63, None, 0.2), (128, "relu", 0.0), (256, "relu", 0.0), (512, "relu", 0.0),
+                   (512, "relu", 0.2), (256, "relu", 0.0), (128, "relu", 0.2), (64, "relu", 0.0))
+
+# Hyperparameter grid: (name, kind, params). MLPs take either "layers" as above, or "hidden"
+# relu layer sizes with the same "dropout" after each. The first MLP is the notebook's.
+SWEEP = [
+    ("mlp_notebook", "mlp", {"layers": NOTEBOOK_LAYERS, "learning_rate": 1e-3, "batch_size": 32}),
+    ("mlp_256x128", "mlp", {"hidden": (256, 128), "dropout": 0.2, "learning_rate": 1e-3, "batch_size": 64}),
+    ("mlp_128x64", "mlp", {"hidden": (128, 64), "dropout": 0.1, "learning_rate": 2e-3, "batch_size": 64}),
+    ("mlp_64", "mlp", {"hidden": (64,), "dropout": 0.0, "learning_rate": 3e-3, "batch_size": 64}),
+    ("mlp_512x256_lr3e-4", "mlp", {"hidden": (512, 256), "dropout": 0.3, "learning_rate": 3e-4, "batch_size": 32}),
+    ("random_forest", "random_forest", {"max_depth": None, "step": 25, "max_trees": 300}),
+    ("random_forest_depth16", "random_forest", {"max_depth": 16, "step": 25, "max_trees": 300}),
+    ("knn_8", "knn", {"n_neighbors": 8}),
+    ("knn_3", "knn", {"n_neighbors": 3}),
+]
+
+# Arrays mapped from shared memory in each worker, set by _attach_dataset()
+_dataset = {}
+_segments = []
+
+
+def load_dataset(path=TRAINING_DATA_PATH):
+    """Returns: (landmarks float32 (n, 63), labels int32 (n,)) with labels indexing ASL_CLASS_NAMES"""
+    with open(path, newline="") as f:
+        rows = list(csv.reader(f))[1:]
+    landmarks = np.array([row[:-1] for row in rows], dtype=np.float32)
+    labels = np.array([ASL_CLASS_NAMES.index(row[-1]) for row in rows], dtype=np.int32)
+    return landmarks, labels
+
+
+def stratified_split(labels, fraction, rng):
+    """Returns: (keep, held_out) index arrays, held_out holding `fraction` of every class"""
+    held_out = []
+    for label in np.unique(labels):
+        members = rng.permutation(np.flatnonzero(labels == label))
+        held_out.append(members[:int(round(len(members) * fraction))])
+    held_out = np.sort(np.concatenate(held_out))
+    return np.setdiff1d(np.arange(len(labels)), held_out), held_out
+
+
+def share_arrays(arrays):
+    """
+    Copy arrays into shared memory.
+    Returns: (segments to unlink when done, {name: (segment name, shape, dtype)} for the workers)
+    """
+    segments, specs = [], {}
+    for name, array in arrays.items():
+        segment = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+        segments.append(segment)
+        specs[name] = (segment.name, array.shape, array.dtype.str)
+    return segments, specs
+
+
+def _attach_dataset(specs):
+    """Worker initializer: map the shared arrays"""
+    for name, (segment_name, shape, dtype) in specs.items():
+        segment = shared_memory.SharedMemory(name=segment_name)
+        _segments.append(segment)
+        _dataset[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+
+
+def _latency_ms(predict, sample, repeats=TRAINING_LATENCY_SAMPLES):
+    """Returns: median wall time in ms of predict() on a single landmark vector"""
+    predict(sample)  # warm-up
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(sample)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times)) * 1000
+
+
+def train_mlp(params, run_dir, name):
+    import tensorflow as tf
+    from tensorflow.keras import layers, callbacks
+
+    tf.config.threading.set_intra_op_parallelism_threads(1)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+    tf.keras.utils.set_random_seed(TRAINING_SEED)
+
+    # Normalization is part of the model, so it takes the raw landmarks HandDetector feeds it
+    normalization = layers.Normalization()
+    normalization.adapt(_dataset["X_train"])
+    model = tf.keras.Sequential([layers.InputLayer(shape=(_dataset["X_train"].shape[1],)), normalization])
+    hidden = params.get("layers") or [(units, "relu", params["dropout"]) for units in params["hidden"]]
+    for units, activation, dropout in hidden:
+        model.add(layers.Dense(units, activation=activation))
+        if dropout:
+            model.add(layers.Dropout(dropout))
+    model.add(layers.Dense(len(ASL_CLASS_NAMES), activation="softmax"))
+    model.compile(optimizer=tf.keras.optimizers.Adam(params["learning_rate"]),
+                  loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+
+    early_stop = callbacks.EarlyStopping(monitor="val_loss", patience=TRAINING_PATIENCE, restore_best_weights=True)
+    history = model.fit(_dataset["X_train"], _dataset["y_train"],
+                        validation_data=(_dataset["X_val"], _dataset["y_val"]),
+                        epochs=TRAINING_MAX_EPOCHS, batch_size=params["batch_size"],
+                        callbacks=[early_stop], verbose=0)
+
+    path = os.path.join(run_dir, f"{name}.keras")
+    model.save(path)
+    predictions = np.argmax(model.predict(_dataset["X_test"], verbose=0), axis=1)
+    return path, predictions, lambda x: model.predict(x, verbose=0), len(history.history["loss"])
+
+
+def train_random_forest(params, run_dir, name):
+    from sklearn.ensemble import RandomForestClassifier
+
+    # Grow the forest in steps and stop once validation accuracy no longer improves
+    model = RandomForestClassifier(n_estimators=0, max_depth=params["max_depth"], warm_start=True,
+                                   n_jobs=1, random_state=TRAINING_SEED)
+    best_accuracy, best_trees, stale = -1.0, 0, 0
+    while model.n_estimators < params["max_trees"] and stale < 2:
+        model.n_estimators += params["step"]
+        model.fit(_dataset["X_train"], _dataset["y_train"])
+        accuracy = float(np.mean(model.predict(_dataset["X_val"]) == _dataset["y_val"]))
+        if accuracy > best_accuracy:
+            best_accuracy, best_trees, stale = accuracy, model.n_estimators, 0
+        else:
+            stale += 1
+    model.estimators_ = model.estimators_[:best_trees]
+    model.n_estimators = best_trees
+    return _save_sklearn(model, run_dir, name), model.predict(_dataset["X_test"]), model.predict_proba, best_trees
+
+
+def train_knn(params, run_dir, name):
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    # Distances need comparable feature scales; the scaler is pickled with the classifier
+    model = make_pipeline(StandardScaler(), KNeighborsClassifier(n_neighbors=params["n_neighbors"], n_jobs=1))
+    model.fit(_dataset["X_train"], _dataset["y_train"])
+    return _save_sklearn(model, run_dir, name), model.predict(_dataset["X_test"]), model.predict_proba, 1
+
+
+def _save_sklearn(model, run_dir, name):
+    path = os.path.join(run_dir, f"{name}.pkl")
+    with open(path, "wb") as f:
+        pickle.dump(model, f)
+    return path
+
+
+TRAINERS = {
+    "mlp": train_mlp,
+    "random_forest": train_random_forest,
+    "knn": train_knn,
+}
+
+
+def run_variant(name, kind, params, run_dir):
+    """Runs in a worker process. Returns: the variant's leaderboard row"""
+    start = time.perf_counter()
+    path, predictions, predict, epochs = TRAINERS[kind](params, run_dir, name)
+    train_time = time.perf_counter() - start
+    return {
+        "name": name,
+        "kind": kind,
+        "accuracy": float(np.mean(predictions == _dataset["y_test"])),
+        "size_kb": os.path.getsize(path) / 1024,
+        "latency_ms": _latency_ms(predict, _dataset["X_test"][:1]),
+        "epochs": epochs,
+        "train_s": train_time,
+        "path": path,
+    }
+
+
+def run_sweep(variants, workers=None, data_path=TRAINING_DATA_PATH, run_dir=TRAINING_RUNS_DIR):
+    """Train all variants in parallel. Returns: leaderboard rows, most accurate first"""
+    os.makedirs(run_dir, exist_ok=True)
+    landmarks, labels = load_dataset(data_path)
+    rng = np.random.default_rng(TRAINING_SEED)
+    train_index, test_index = stratified_split(labels, TRAINING_TEST_SIZE, rng)
+    # Early stopping watches a slice of the training data, the test set is only used for the leaderboard
+    fit_index, val_index = stratified_split(labels[train_index], TRAINING_VALIDATION_SIZE, rng)
+    fit_index, val_index = train_index[fit_index], train_index[val_index]
+
+    segments, specs = share_arrays({
+        "X_train": landmarks[fit_index], "y_train": labels[fit_index],
+        "X_val": landmarks[val_index], "y_val": labels[val_index],
+        "X_test": landmarks[test_index], "y_test": labels[test_index],
+    })
+    print(f"{len(fit_index)} training, {len(val_index)} validation, {len(test_index)} test samples, "
+          f"{len(variants)} variants")
+
+    # One thread per worker, the parallelism comes from the processes. Set before spawning so that
+    # the BLAS libraries read it when the workers import them.
+    for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+        os.environ[var] = "1"
+
+    rows = []
+    try:
+        # Spawned workers, so none of them inherits a half-initialized TensorFlow from the parent
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), mp_context=get_context("spawn"),
+                                 initializer=_attach_dataset, initargs=(specs,)) as pool:
+            futures = {pool.submit(run_variant, name, kind, params, run_dir): name
+                       for name, kind, params in variants}
+            for future in as_completed(futures):
+                try:
+                    row = future.result()
+                except Exception as e:
+                    print(f"{futures[future]}: failed ({e})")
+                    continue
+                rows.append(row)
+                print(f"{row['name']}: accuracy {row['accuracy']:.2%}, {row['latency_ms']:.2f} ms, "
+                      f"{row['size_kb']:.0f} KB, {row['train_s']:.0f} s")
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+    rows.sort(key=lambda row: (-row["accuracy"], row["latency_ms"]))
+    return rows
+
+
+def write_leaderboard(rows, path):
+    columns = ["name", "kind", "accuracy", "size_kb", "latency_ms", "epochs", "train_s", "path"]
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_leaderboard(rows):
+    print(f"\n{'model':<24}{'accuracy':>10}{'size KB':>10}{'latency ms':>12}{'epochs':>8}")
+    for row in rows:
+        print(f"{row['name']:<24}{row['accuracy']:>10.2%}{row['size_kb']:>10.0f}"
+              f"{row['latency_ms']:>12.2f}{row['epochs']:>8}")
+
+
+def choose_deployable(rows, max_latency_ms=None, max_size_kb=None):
+    """Returns: the most accurate Keras model within the serving budget, or None"""
+    for row in rows:
+        if row["kind"] != "mlp":
+            continue  # HandDetector loads Keras models only
+        if max_latency_ms is not None and row["latency_ms"] > max_latency_ms:
+            continue
+        if max_size_kb is not None and row["size_kb"] > max_size_kb:
+            continue
+        return row
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train classifier variants in parallel and rank them")
+    parser.add_argument("--data", default=TRAINING_DATA_PATH, help="landmark CSV exported by the notebook")
+    parser.add_argument("--output-dir", default=TRAINING_RUNS_DIR, help="where models and the leaderboard go")
+    parser.add_argument("--workers", type=int, help="parallel processes (default: one per core)")
+    parser.add_argument("--kinds", nargs="+", choices=sorted(TRAINERS), help="only train these model kinds")
+    parser.add_argument("--deploy", action="store_true",
+                        help=f"replace {MODEL_PATH} with the best Keras model within the budget")
+    parser.add_argument("--max-latency-ms", type=float, help="serving budget for --deploy")
+    parser.add_argument("--max-size-kb", type=float, help="size budget for --deploy")
+    args = parser.parse_args()
+
+    variants = [variant for variant in SWEEP if not args.kinds or variant[1] in args.kinds]
+    leaderboard = run_sweep(variants, args.workers, args.data, args.output_dir)
+    print_leaderboard(leaderboard)
+    leaderboard_path = os.path.join(args.output_dir, "leaderboard.csv")
+    write_leaderboard(leaderboard, leaderboard_path)
+    print(f"Wrote {leaderboard_path}")
+
+    if args.deploy:
+        best = choose_deployable(leaderboard, args.max_latency_ms, args.max_size_kb)
+        if best is None:
+            raise SystemExit("No Keras model fits the budget, nothing deployed")
+        # Copied next to the target and renamed, so a running model registry never sees a partial file
+        tmp_path = MODEL_PATH + ".tmp"
+        shutil.copyfile(best["path"], tmp_path)
+        os.replace(tmp_path, MODEL_PATH)
+        print(f"Deployed {best['name']} to {MODEL_PATH}")
@@ -1,12 +1,26 @@
+import logging
+
 import customtkinter as ctk
 import cv2
 
-from config import WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, CAMERA_INDEX
+from config import (WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE, CAMERA_INDEX, CAMERA_PROFILE, CAMERA_PROFILES,
+                    INFERENCE_WORKER, HARD_EXAMPLES, CONFUSION_FILE,
+                    ATTEMPTS_FILE, MOTION_GATE, SYNC_ENDPOINT, SYNC_POLL_MS, LEARNER_NAME, errors)
 from models.hand_detector import HandDetector
+from models.inference_worker import InferenceWorker
+from models.motion_gate import MotionGate
 from ui.home_screen import HomeScreen
 from ui.quiz_screen import QuizScreen
 from ui.phrase_screen import PhraseScreen
+from utils.attempt_log import AttemptLog, load_attempts
+from utils.camera import open_camera, probed_profile
+from utils.confusion_matrix import ConfusionTracker
+from utils.hard_examples import HardExampleRecorder
 from utils.image_utils import create_blank_image, create_ctk_image
+from utils.learner_profile import profile_path, set_learner, current_learner
+from utils.profile_sync import ProfileSync, merge_into_errors
+
+logger = logging.getLogger(__name__)
 
 
 class ASLQuizApp(ctk.CTk):
@@ -19,6 +33,12 @@ class ASLQuizApp(ctk.CTk):
         # Initialize variables
         self.cap = None  # Camera object
         self.detector = None  # Hand detector object
+        self.camera_profile = None  # profile picked by the probe, kept for the whole run
+        self.hard_examples = HardExampleRecorder() if HARD_EXAMPLES else None
+        self.confusion = None
+        self.attempts = None
+        self.sync = ProfileSync() if SYNC_ENDPOINT else None
+        self.login(LEARNER_NAME)
         self.difficulty = "easy"
         self.target_letter = None
 
@@ -33,6 +53,38 @@ class ASLQuizApp(ctk.CTk):
 
         # Set up initial screen
         self.show_home_screen()
+        if self.sync:
+            self.after(SYNC_POLL_MS, self._poll_sync)
+
+    def login(self, name):
+        """Switch to the learner's profile, and merge their records from other stations if syncing"""
+        if self.confusion:
+            self.confusion.save()
+        set_learner(name)
+        self.confusion = ConfusionTracker(profile_path(CONFUSION_FILE))
+        self.attempts = AttemptLog(profile_path(ATTEMPTS_FILE))
+        # The statistics are the learner's own, rebuilt from the attempts made on this station
+        self._reset_errors()
+        merge_into_errors(load_attempts(self.attempts.path), errors)
+        if self.detector:
+            self.detector.load_learner()
+        if self.sync:
+            self.sync.login(current_learner())
+
+    @staticmethod
+    def _reset_errors():
+        # Same starting values as in config, 1 avoids divisions by zero
+        for key in ('video_tests', 'text_tests', 'text_total_errors', 'video_total_errors'):
+            errors[key] = 1
+        for stats in errors['letters'].values():
+            stats['video_errors'] = stats['text_errors'] = 1
+
+    def _poll_sync(self):
+        """Apply profiles fetched by the sync thread, on the Tk thread that owns config.errors"""
+        for learner, records in self.sync.poll_merged():
+            merge_into_errors(records, errors)
+            logger.info("Profile sync: merged %d attempts of %s", len(records), learner)
+        self.after(SYNC_POLL_MS, self._poll_sync)
 
     def show_home_screen(self):
         self.quiz_screen.pack_forget()
@@ -41,19 +93,21 @@ class ASLQuizApp(ctk.CTk):
 
         # Release camera and detector if active
         self._release_resources()
+        self.confusion.save()
 
         # Adjust window size to fit home screen
         self._adjust_window_size()
 
     def start_quiz(self, difficulty):
         self.difficulty = difficulty
+        self.quiz_screen.set_difficulty(difficulty)
         self.home_screen.pack_forget()
         self.phrase_screen.pack_forget()
         self.quiz_screen.pack(fill="both", expand=True)
 
-        # Initialize camera and hand detector
-        self.cap = self._init_camera()
+        # Initialize hand detector and camera (the camera probe times the detector)
         self.detector = self._init_detector()
+        self.cap = self._init_camera()
 
         # Adjust window size to fit quiz screen
         self._adjust_window_size()
@@ -68,9 +122,9 @@ class ASLQuizApp(ctk.CTk):
         self.quiz_screen.pack_forget()
         self.phrase_screen.pack(fill="both", expand=True)
 
-        # Initialize camera and hand detector if not already initialized
-        self.cap = self._init_camera()
+        # Initialize hand detector and camera (the camera probe times the detector)
         self.detector = self._init_detector()
+        self.cap = self._init_camera()
 
         # Adjust window size to fit phrase screen
         self._adjust_window_size()
@@ -78,16 +132,35 @@ class ASLQuizApp(ctk.CTk):
         # Start the phrase practice with an optional specific phrase
         self.phrase_screen.start_phrase_practice(phrase)
 
+    def start_free_spelling(self):
+        """Start the free spelling mode, decoding fingerspelled words against the lexicon"""
+        self.home_screen.pack_forget()
+        self.quiz_screen.pack_forget()
+        self.phrase_screen.pack(fill="both", expand=True)
+
+        self.detector = self._init_detector()
+        self.cap = self._init_camera()
+
+        self._adjust_window_size()
+        self.phrase_screen.start_free_spelling()
+
     def _init_camera(self):
-        """Initialize the camera"""
-        cap = cv2.VideoCapture(CAMERA_INDEX)
-        if not cap.isOpened():
-            raise RuntimeError("Could not open webcam")
-        return cap
+        """Initialize the camera with the configured capture profile"""
+        profile = CAMERA_PROFILE
+        if profile == "auto":
+            # Probed once per camera (the pick is cached), timing the real detector when it runs
+            # in this process
+            if self.camera_profile is None:
+                detector = self.detector.detector if isinstance(self.detector, MotionGate) else self.detector
+                process = detector.process_frame if isinstance(detector, HandDetector) else None
+                self.camera_profile = probed_profile(CAMERA_INDEX, process=process)
+            profile = self.camera_profile
+        return open_camera(CAMERA_INDEX, CAMERA_PROFILES.get(profile))
 
     def _init_detector(self):
-        """Initialize the hand detector"""
-        return HandDetector()
+        """Initialize the hand detector, in a separate process and behind the motion gate if configured"""
+        detector = InferenceWorker() if INFERENCE_WORKER else HandDetector()
+        return MotionGate(detector) if MOTION_GATE else detector
 
     def next_letter(self):
         """Generate the next letter for the quiz"""
@@ -107,28 +180,53 @@ class ASLQuizApp(ctk.CTk):
 
         # Flip frame for mirror effect and process with hand detector
         frame = cv2.flip(frame, 1)
-        processed_frame, results = self.detector.process_frame(frame)
+        frame, results = self.detector.process_frame(frame)
 
         # Process hand detection results
         landmarks = self.detector.extract_landmarks(results)
         if landmarks is not None:
             # Get prediction
-            predicted_letter, confidence = self.detector.predict_letter(landmarks)
+            probabilities = self.detector.predict_probabilities(landmarks)
+            predicted_letter, confidence = self.detector.predict_letter(landmarks, probabilities)
             if predicted_letter:
-                self.quiz_screen.update_prediction(predicted_letter)
+                self.quiz_screen.update_prediction(predicted_letter, landmarks, probabilities)
         else:
             # Clear prediction when no hand detected
             self.quiz_screen.clear_prediction()
 
         # Update the canvas with the processed frame
-        self.quiz_screen.update_canvas(processed_frame)
+        self.quiz_screen.update_canvas(frame, landmarks)
 
         # Schedule next frame update
         self.after(10, self.update_frame)
 
+    def record_hard_example(self, landmarks, target, predicted, probabilities):
+        """Keep the frame for retraining if hard-example capture is enabled"""
+        if self.hard_examples:
+            self.hard_examples.record(landmarks, target, predicted, probabilities)
+
+    def record_attempt(self, mode, target, correct, duration, error, tries=0):
+        """Log an answered question in the learner's attempt log and queue it for syncing"""
+        record = self.attempts.record(mode, target, correct, duration, error, tries)
+        if record is not None and self.sync:
+            self.sync.record(current_learner(), record)
+
+    def record_prediction(self, target, predicted):
+        """Count a wrong prediction in the confusion matrix once it is stable"""
+        self.confusion.observe(target, predicted)
+
+    def record_correct(self, target):
+        """Count a correctly signed letter in the confusion matrix"""
+        self.confusion.record_correct(target)
+
     def on_closing(self):
         """Handle application closing"""
         self._release_resources()
+        self.confusion.save()
+        if self.sync:
+            self.sync.close()
+        if self.hard_examples:
+            self.hard_examples.close()
         self.destroy()
 
     def _release_resources(self):
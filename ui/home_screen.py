@@ -1,7 +1,9 @@
 import customtkinter as ctk
 import matplotlib
+import numpy as np
 
-from config import FONT_FAMILY, errors, ASL_CLASS_NAMES
+from config import FONT_FAMILY, errors, ASL_ALPHABET
+from utils.learner_profile import current_learner
 
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
@@ -31,6 +33,33 @@ class HomeScreen(ctk.CTkFrame):
         )
         instruction_label.pack(pady=10)
 
+        # Learner selection, statistics and profiles are kept per learner
+        learner_frame = ctk.CTkFrame(self, fg_color="transparent")
+        learner_frame.pack(pady=5)
+
+        self.learner_entry = ctk.CTkEntry(
+            learner_frame,
+            width=200,
+            font=(FONT_FAMILY, 16),
+            placeholder_text="Learner name"
+        )
+        self.learner_entry.grid(row=0, column=0, padx=10, pady=5)
+
+        learner_button = ctk.CTkButton(
+            learner_frame,
+            text="Switch Learner",
+            font=(FONT_FAMILY, 16),
+            command=self._switch_learner
+        )
+        learner_button.grid(row=0, column=1, padx=10, pady=5)
+
+        self.learner_label = ctk.CTkLabel(
+            learner_frame,
+            text=f"Learner: {current_learner()}",
+            font=(FONT_FAMILY, 14)
+        )
+        self.learner_label.grid(row=1, column=0, columnspan=2)
+
         # Mode selection frame
         modes_frame = ctk.CTkFrame(self, fg_color="transparent")
         modes_frame.pack(pady=10)
@@ -78,6 +107,15 @@ class HomeScreen(ctk.CTkFrame):
         )
         phrase_button.grid(row=3, column=0, columnspan=2, padx=10, pady=5)
 
+        # Free spelling button
+        free_spelling_button = ctk.CTkButton(
+            modes_frame,
+            text="Free Spelling",
+            font=(FONT_FAMILY, 16),
+            command=self.app.start_free_spelling,
+        )
+        free_spelling_button.grid(row=4, column=0, columnspan=2, padx=10, pady=5)
+
         # Custom phrase frame
         custom_phrase_frame = ctk.CTkFrame(self, fg_color="transparent")
         custom_phrase_frame.pack(pady=10)
@@ -109,12 +147,20 @@ class HomeScreen(ctk.CTkFrame):
         )
         stats_button.pack(pady=20)
 
+    def _switch_learner(self):
+        """Log in as the learner typed in the entry"""
+        name = self.learner_entry.get().strip()
+        if name:
+            self.app.login(name)
+            self.learner_label.configure(text=f"Learner: {current_learner()}")
+            self.learner_entry.delete(0, ctk.END)
+
     def _start_custom_phrase(self):
         """Start practice with a custom phrase from entry"""
         phrase = self.phrase_entry.get().strip()
         if phrase:
             # Filter to ensure phrase only contains valid ASL letters
-            valid_chars = set(ASL_CLASS_NAMES + [" "])
+            valid_chars = set(ASL_ALPHABET + [" "])
             phrase = "".join(c for c in phrase.upper() if c in valid_chars)
             if phrase:
                 self.app.start_phrase_practice(phrase)
@@ -122,7 +168,7 @@ class HomeScreen(ctk.CTkFrame):
     def show_statistics_popup(self):
         popup = ctk.CTkToplevel(self)
         popup.title("Error Statistics")
-        popup.geometry("750x650")
+        popup.geometry("750x750")
         popup.grab_set()
 
         title = ctk.CTkLabel(
@@ -132,8 +178,34 @@ class HomeScreen(ctk.CTkFrame):
         )
         title.pack(pady=10)
 
+        # Bar chart of the error scores and heatmap of the confusions, one tab each
+        tabs = ctk.CTkTabview(popup)
+        tabs.pack(padx=20, pady=10, fill="both", expand=True)
+        self._plot_errors(tabs.add("Errors"))
+        self._plot_confusions(tabs.add("Confusions"))
+
+        # Totals
+        totals = ctk.CTkLabel(
+            popup,
+            text=f"Total Video Errors: {errors['video_total_errors']:.2f}\n"
+                 f"Total Text Errors: {errors['text_total_errors']:.2f}\n"
+                 f"Video Tests: {errors['video_tests']}\n"
+                 f"Text Tests: {errors['text_tests']}",
+            font=(FONT_FAMILY, 14)
+        )
+        totals.pack(pady=10)
+
+    @staticmethod
+    def _embed_figure(fig, master):
+        plot_frame = ctk.CTkFrame(master, fg_color="transparent")
+        plot_frame.pack(fill="both", expand=True)
+        canvas = FigureCanvasTkAgg(fig, master=plot_frame)
+        canvas.draw()
+        canvas.get_tk_widget().pack(padx=10, pady=10, fill="both", expand=True)
+
+    def _plot_errors(self, master):
         # Prepare data for plotting
-        letters = ASL_CLASS_NAMES
+        letters = ASL_ALPHABET
         video_errors = [errors['letters'][ltr]['video_errors'] for ltr in letters]
         text_errors = [errors['letters'][ltr]['text_errors'] for ltr in letters]
 
@@ -156,20 +228,27 @@ class HomeScreen(ctk.CTkFrame):
         ax.tick_params(axis='x', colors='white')
         fig.tight_layout(pad=3.0)
 
-        # Embed the plot in the popup with padding
-        plot_frame = ctk.CTkFrame(popup, fg_color="transparent")
-        plot_frame.pack(padx=20, pady=10, fill="both", expand=True)
-        canvas = FigureCanvasTkAgg(fig, master=plot_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(padx=10, pady=10, fill="both", expand=True)
+        self._embed_figure(fig, master)
 
-        # Totals
-        totals = ctk.CTkLabel(
-            popup,
-            text=f"Total Video Errors: {errors['video_total_errors']:.2f}\n"
-                 f"Total Text Errors: {errors['text_total_errors']:.2f}\n"
-                 f"Video Tests: {errors['video_tests']}\n"
-                 f"Text Tests: {errors['text_tests']}",
-            font=(FONT_FAMILY, 14)
-        )
-        totals.pack(pady=10)
+    def _plot_confusions(self, master):
+        confusion = self.app.confusion
+        # Rows are normalized per target letter, so letters asked more often don't dominate
+        counts = confusion.counts
+        rates = counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+
+        fig, ax = plt.subplots(figsize=(7, 6), facecolor='#222222')
+        ax.set_facecolor('#222222')
+        image = ax.imshow(rates, cmap='magma', vmin=0, vmax=1)
+        ticks = range(len(ASL_ALPHABET))
+        ax.set_xticks(ticks)
+        ax.set_xticklabels(ASL_ALPHABET, color='white', fontsize=8)
+        ax.set_yticks(ticks)
+        ax.set_yticklabels(ASL_ALPHABET, color='white', fontsize=8)
+        ax.set_xlabel('Recognized letter', color='white')
+        ax.set_ylabel('Target letter', color='white')
+        pairs = ", ".join(f"{a}/{b}" for a, b, _ in confusion.confused_pairs(3))
+        ax.set_title(f"Most confused: {pairs}" if pairs else "No confusions yet", color='white')
+        fig.colorbar(image, ax=ax, fraction=0.046, pad=0.04)
+        fig.tight_layout(pad=2.0)
+
+        self._embed_figure(fig, master)
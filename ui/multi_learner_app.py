@@ -0,0 +1,118 @@
+import math
+import random
+
+import customtkinter as ctk
+
+from config import FONT_FAMILY, WINDOW_TITLE, FRAME_UPDATE_MS, MULTI_STREAM_PANEL_SIZE
+from models.stream_pool import MultiStreamPipeline
+from utils.image_utils import process_frame
+
+
+class LearnerPanel(ctk.CTkFrame):
+    """Video quiz for one learner: own camera view, target letter and error counts"""
+
+    def __init__(self, master, name, letters):
+        super().__init__(master)
+        self.letters = letters
+        self.target_letter = None
+        self.completed = False  # flag to allow a 1-second delay between two letters
+        self.missed = False  # a wrong sign was already counted for the current letter
+        self.score = 0
+        # initialize to 1 so that every letter keeps a chance of being picked
+        self.letter_errors = {ltr: 1 for ltr in letters}
+        self._build_ui(name)
+        self.next_letter()
+
+    def _build_ui(self, name):
+        width, height = MULTI_STREAM_PANEL_SIZE
+
+        self.label_title = ctk.CTkLabel(self, text=name, font=(FONT_FAMILY, 16, "bold"))
+        self.label_title.grid(row=0, column=0, columnspan=2, pady=5)
+
+        self.canvas = ctk.CTkCanvas(self, width=width, height=height, bg="black")
+        self.canvas.grid(row=1, column=0, columnspan=2, padx=5)
+
+        self.label_target = ctk.CTkLabel(
+            self, text="", font=(FONT_FAMILY, 36, "bold"), text_color="#4F8DFD", width=80
+        )
+        self.label_target.grid(row=2, column=0, pady=5)
+
+        self.predicted_letter = ctk.CTkLabel(
+            self, text="", font=(FONT_FAMILY, 36, "bold"), text_color="#FFB347", width=80
+        )
+        self.predicted_letter.grid(row=2, column=1, pady=5)
+
+        self.label_status = ctk.CTkLabel(self, text="", font=(FONT_FAMILY, 12))
+        self.label_status.grid(row=3, column=0, columnspan=2, pady=(0, 5))
+
+    def next_letter(self):
+        self.completed = False
+        self.missed = False
+        weights = [self.letter_errors[ltr] for ltr in self.letters]
+        self.target_letter = random.choices(self.letters, weights=weights, k=1)[0]
+        self.label_target.configure(text=self.target_letter)
+        self.predicted_letter.configure(text="")
+
+    def update_output(self, output, fps):
+        if output.frame is not None:
+            imgtk = process_frame(output.frame, output.landmarks, MULTI_STREAM_PANEL_SIZE)
+            self.canvas.create_image(0, 0, anchor="nw", image=imgtk)
+            self.canvas.imgtk = imgtk
+
+        self.label_status.configure(text=f"Score: {self.score}   {fps:.1f} FPS")
+        if self.completed or not output.letter:
+            return
+
+        self.predicted_letter.configure(text=output.letter)
+        if output.letter == self.target_letter:
+            self.score += 1
+            self.completed = True
+            self.after(1000, self.next_letter)
+        elif not self.missed:
+            self.letter_errors[self.target_letter] += 1
+            self.missed = True
+
+
+class MultiLearnerApp(ctk.CTk):
+    """One window with a quiz panel per video source, all fed by a shared batched pipeline"""
+
+    def __init__(self, sources):
+        super().__init__()
+        self.title(f"{WINDOW_TITLE} - {len(sources)} learners")
+
+        self.pipeline = MultiStreamPipeline(sources)
+        letters = self.pipeline.streams[0].detector.letters
+
+        # Lay the panels out in a near-square grid
+        columns = math.ceil(math.sqrt(len(sources)))
+        self.panels = []
+        for i, source in enumerate(sources):
+            panel = LearnerPanel(self, f"Learner {i + 1} ({source})", letters)
+            panel.grid(row=i // columns, column=i % columns, padx=5, pady=5)
+            self.panels.append(panel)
+
+        self.label_fps = ctk.CTkLabel(self, text="", font=(FONT_FAMILY, 14))
+        self.label_fps.grid(row=math.ceil(len(sources) / columns), column=0, columnspan=columns, pady=5)
+
+        self.update_frames()
+
+    def update_frames(self):
+        if not self.pipeline:
+            return
+
+        outputs = self.pipeline.tick()
+        for panel, output, fps in zip(self.panels, outputs, self.pipeline.stream_fps()):
+            panel.update_output(output, fps)
+        self.label_fps.configure(
+            text=f"Aggregate: {self.pipeline.aggregate_fps():.1f} FPS "
+                 f"({self.pipeline.tick_counter.fps:.1f} ticks/s)"
+        )
+
+        self.after(FRAME_UPDATE_MS, self.update_frames)
+
+    def on_closing(self):
+        """Handle application closing"""
+        if self.pipeline:
+            self.pipeline.close()
+            self.pipeline = None
+        self.destroy()
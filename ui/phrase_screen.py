@@ -1,8 +1,15 @@
+import os
+import random
+import time
+
 import customtkinter as ctk
 import cv2
 
-from config import FONT_FAMILY, ASL_CLASS_NAMES
+from config import FONT_FAMILY, VIDEO_CANVAS_SIZE, LEXICON_PATH, PHRASE_CORPUS_PATH, PHRASE_CORPUS_TOP_K, errors
+from models.fingerspelling_decoder import FingerspellingDecoder
 from utils.image_utils import load_asl_letter_image, process_frame
+from utils.lexicon_trie import LexiconTrie
+from utils.phrase_corpus import PhraseCorpus
 
 
 class PhraseScreen(ctk.CTkFrame):
@@ -11,9 +18,14 @@ class PhraseScreen(ctk.CTkFrame):
         self.app = master
         self.phrase = ""
         self.current_index = 0
-        self.timer = 0
+        self.timer = 0  # when the current letter was shown
         self.phrase_errors = 0
         self.letter_completed = False
+        self.free_spelling = False  # decode whatever is spelled instead of following a phrase
+        self.lexicon = None
+        self.decoder = None
+        self.corpus = None
+        self.frame_job = None  # pending update_frame call, so only one frame loop runs
         self._build_ui()
 
     def _build_ui(self):
@@ -46,7 +58,7 @@ class PhraseScreen(ctk.CTkFrame):
         self.progress_label.grid(row=2, column=0, columnspan=2, pady=5)
 
         # Video canvas
-        self.canvas = ctk.CTkCanvas(self, width=500, height=400, bg="black")
+        self.canvas = ctk.CTkCanvas(self, width=VIDEO_CANVAS_SIZE[0], height=VIDEO_CANVAS_SIZE[1], bg="black")
         self.canvas.grid(row=3, column=0, columnspan=2, pady=10)
 
         # Current target letter display
@@ -102,35 +114,88 @@ class PhraseScreen(ctk.CTkFrame):
 
     def start_phrase_practice(self, phrase=None):
         """Initialize or reset the phrase practice with a new or provided phrase"""
+        self.free_spelling = False
+        self.label_title.configure(text="ASL Phrase Practice")
+        self.button_skip.configure(text="Skip Letter", command=self._skip_letter)
+        self.button_new.grid()
+        self.label_feedback.configure(text="")
+
+        # Begin camera processing if not already running
+        if not self.app.cap or not self.app.detector:
+            self.app.detector = self.app._init_detector()
+            self.app.cap = self.app._init_camera()
+        letters = self.app.detector.letters
+
         if not phrase:
-            # Default phrases list
-            phrases = [
-                "HELLO WORLD",
-                "LEARN ASL",
-                "SIGN LANGUAGE",
-                "PRACTICE MAKES PERFECT",
-                "GOOD MORNING",
-                "NICE TO MEET YOU"
-            ]
-            import random
+            # Only phrases the detector can follow entirely, e.g. none with J or Z without the motion model
+            phrases = [p for p in self._weak_letter_phrases() if self._signable(p, letters)]
+            if not phrases:
+                # Default phrases list
+                phrases = [
+                    "HELLO WORLD",
+                    "LEARN ASL",
+                    "SIGN LANGUAGE",
+                    "PRACTICE MAKES PERFECT",
+                    "GOOD MORNING",
+                    "NICE TO MEET YOU"
+                ]
+                phrases = [p for p in phrases if self._signable(p, letters)] or phrases
             phrase = random.choice(phrases)
 
-        # Convert to uppercase and filter out characters not in ASL_CLASS_NAMES
-        self.phrase = "".join([c for c in phrase.upper() if c in ASL_CLASS_NAMES or c == " "])
+        # Convert to uppercase and filter out characters the detector can't recognize
+        self.phrase = "".join([c for c in phrase.upper() if c in letters or c == " "])
         self.current_index = 0
+        self.timer = time.time()
         self.phrase_errors = 0
         self.letter_completed = False
 
         # Initialize display for the first letter
         self._update_phrase_display()
 
-        # Begin camera processing if not already running
-        if not self.app.cap or not self.app.detector:
-            self.app.cap = self.app._init_camera()
-            self.app.detector = self.app._init_detector()
-
         # Start processing frames
-        self.update_frame()
+        self._start_frame_loop()
+
+    @staticmethod
+    def _signable(phrase, letters):
+        return all(c in letters or c == " " for c in phrase.upper())
+
+    def _weak_letter_phrases(self):
+        """Returns: phrases from the corpus that target the letters with the most video errors"""
+        if not os.path.exists(PHRASE_CORPUS_PATH):
+            return []
+
+        # The corpus and the lexicon are memory-mapped, so they are opened once and kept
+        if self.corpus is None:
+            self.corpus = PhraseCorpus(PHRASE_CORPUS_PATH)
+        letter_errors = {ltr: stats['video_errors'] for ltr, stats in errors['letters'].items()}
+        return self.corpus.weak_letter_phrases(letter_errors, PHRASE_CORPUS_TOP_K)
+
+    def start_free_spelling(self):
+        """Decode free fingerspelling into words constrained by the lexicon"""
+        # Clear what is left of a previous phrase, also when the lexicon is missing
+        self.phrase = ""
+        self.label_title.configure(text="ASL Free Spelling")
+        self.button_new.grid_remove()
+        self.phrase_label.configure(text="")
+        self.progress_label.configure(text="Words: 0")
+        self.current_letter.configure(text="")
+        self.asl_image.configure(image=self.app.blank_ctk_image, text="")
+
+        if not os.path.exists(LEXICON_PATH):
+            self.free_spelling = False
+            self._stop_frame_loop()
+            self.label_feedback.configure(text=f"Lexicon not found: {LEXICON_PATH}", text_color="red")
+            return
+
+        if self.lexicon is None:
+            self.lexicon = LexiconTrie(LEXICON_PATH)
+        self.decoder = FingerspellingDecoder(self.lexicon, self.app.detector.class_names)
+
+        self.free_spelling = True
+        self.button_skip.configure(text="Clear Text", command=self._clear_free_spelling)
+        self.label_feedback.configure(text="Spell a word, then lower your hand", text_color="gray")
+
+        self._start_frame_loop()
 
     def _update_phrase_display(self):
         """Update the phrase display"""
@@ -170,55 +235,98 @@ class PhraseScreen(ctk.CTkFrame):
             self.current_letter.configure(text="")
             self.asl_image.configure(image=self.app.blank_ctk_image, text="")
 
+    def _start_frame_loop(self):
+        """Start processing frames, replacing the loop of a previous phrase if it still runs"""
+        self._stop_frame_loop()
+        self.update_frame()
+
+    def _stop_frame_loop(self):
+        if self.frame_job is not None:
+            self.after_cancel(self.frame_job)
+            self.frame_job = None
+
     def update_frame(self):
         """Update the webcam feed and process hand gestures"""
+        self.frame_job = None
         if not self.app.cap or not self.app.detector:
             return
 
         # Capture frame
         success, frame = self.app.cap.read()
         if not success:
-            self.after(10, self.update_frame)
+            self.frame_job = self.after(10, self.update_frame)
             return
 
         # Flip frame for mirror effect and process with hand detector
         frame = cv2.flip(frame, 1)
-        processed_frame, results = self.app.detector.process_frame(frame)
+        frame, results = self.app.detector.process_frame(frame)
+        landmarks = self.app.detector.extract_landmarks(results)
 
         # Process hand detection results
-        if self.current_index < len(self.phrase) and self.phrase[self.current_index] != " ":
-            landmarks = self.app.detector.extract_landmarks(results)
+        if self.free_spelling:
+            self._handle_free_spelling(landmarks)
+        elif self.current_index < len(self.phrase) and self.phrase[self.current_index] != " ":
             if landmarks is not None:
                 # Get prediction
-                predicted_letter, confidence = self.app.detector.predict_letter(landmarks)
+                probabilities = self.app.detector.predict_probabilities(landmarks)
+                predicted_letter, confidence = self.app.detector.predict_letter(landmarks, probabilities)
                 if predicted_letter:
-                    self._handle_prediction(predicted_letter)
+                    self._handle_prediction(predicted_letter, landmarks, probabilities)
             else:
                 # No hand detected
                 self.label_feedback.configure(text="No hand detected", text_color="orange")
 
-        # Update the canvas with the processed frame
-        imgtk = process_frame(processed_frame)
+        # Update the canvas with the frame and the landmark overlay
+        imgtk = process_frame(frame, landmarks)
         self.canvas.create_image(0, 0, anchor="nw", image=imgtk)
         self.canvas.imgtk = imgtk
 
         # Schedule next frame update if we're still in the phrase
-        if self.current_index < len(self.phrase):
-            self.after(10, self.update_frame)
+        if self.free_spelling or self.current_index < len(self.phrase):
+            self.frame_job = self.after(10, self.update_frame)
         else:
             # Phrase completed!
             self._show_completion()
 
-    def _handle_prediction(self, predicted_letter):
+    def _handle_free_spelling(self, landmarks):
+        """Feed the current frame's letter probabilities to the decoder and show the transcript"""
+        probabilities = None
+        if landmarks is not None:
+            probabilities = self.app.detector.predict_probabilities(landmarks)
+        self.decoder.step(probabilities)
+
+        # Only touch the labels when their text actually changes
+        transcript = self.decoder.transcript()
+        if transcript != self.phrase:
+            self.phrase = transcript
+            self.phrase_label.configure(text=transcript)
+            self.progress_label.configure(text=f"Words: {len(self.decoder.words)}")
+        letter = self.decoder.current_letter() or ""
+        if letter != self.current_letter.cget("text"):
+            self.current_letter.configure(text=letter)
+
+    def _clear_free_spelling(self):
+        """Forget the decoded words"""
+        self.decoder.clear()
+        self.phrase = ""
+        self.phrase_label.configure(text="")
+        self.progress_label.configure(text="Words: 0")
+
+    def _handle_prediction(self, predicted_letter, landmarks=None, probabilities=None):
         """Handle a letter prediction from the hand detector"""
         if self.letter_completed:
             return  # Ignore predictions during the pause between letters
 
         target_letter = self.phrase[self.current_index]
+        self.app.record_hard_example(landmarks, target_letter, predicted_letter, probabilities)
+        self.app.record_prediction(target_letter, predicted_letter)
 
         if predicted_letter == target_letter:
             # Correct letter!
             self.label_feedback.configure(text="Correct!", text_color="green")
+            self.app.record_correct(target_letter)
+            self.app.detector.confirm_letter(predicted_letter)
+            self.app.record_attempt('phrase', target_letter, True, time.time() - self.timer, 0)
             self.letter_completed = True
 
             # Add a slight delay before moving to next letter
@@ -238,6 +346,7 @@ class PhraseScreen(ctk.CTkFrame):
 
         # Advance index
         self.current_index += 1
+        self.timer = time.time()
 
         # Update display
         self._update_phrase_display()
@@ -261,7 +370,11 @@ class PhraseScreen(ctk.CTkFrame):
     def _skip_letter(self):
         """Skip the current letter"""
         if self.current_index < len(self.phrase):
-            self.phrase_errors += 1
+            # A space is not a sign, skipping it is neither an error nor an attempt
+            if self.phrase[self.current_index] != " ":
+                self.phrase_errors += 1
+                self.app.record_attempt('phrase', self.phrase[self.current_index], False,
+                                        time.time() - self.timer, 1)
             self._move_to_next_letter()
 
     def _new_phrase(self):
@@ -1,11 +1,16 @@
+import logging
 import random
 import time
+from collections import deque
 
 import customtkinter as ctk
 
-from config import FONT_FAMILY, ASL_CLASS_NAMES, errors
+from config import (FONT_FAMILY, ASL_CLASS_NAMES, VIDEO_CANVAS_SIZE, MEASURE_TRANSITIONS, CONFUSION_PAIR_PROBABILITY,
+                    CONFUSION_WEIGHT, errors)
 from utils.image_utils import load_asl_letter_image, process_frame
 
+logger = logging.getLogger(__name__)
+
 
 class QuizScreen(ctk.CTkFrame):
 
@@ -15,8 +20,10 @@ class QuizScreen(ctk.CTkFrame):
         self.target_letter = None
         self.test_mode = None  # video or image
         self.timer = 0
+        self.question_start = 0
         self.number_attempts = 0
         self.video_completed = False  # flag to allow a 1-second delay between two words
+        self.transition_times = deque(maxlen=100)  # question change latencies in ms
         self._build_ui()
 
     def _build_ui(self):
@@ -27,19 +34,49 @@ class QuizScreen(ctk.CTkFrame):
         self.label_title = ctk.CTkLabel(self, text="ASL Quiz", font=(FONT_FAMILY, 24, "bold"))
         self.label_title.grid(row=0, column=0, columnspan=2, pady=10)
 
+        # Both layouts are built once and stacked in the same cell, so changing question type
+        # is a single tkraise() and the screen keeps the same size for the whole quiz
+        self.video_layout = ctk.CTkFrame(self, fg_color="transparent")
+        self.video_layout.grid(row=1, column=0, columnspan=2, sticky="nsew")
+        self._build_video_layout(self.video_layout)
+
+        self.text_layout = ctk.CTkFrame(self, fg_color="transparent")
+        self.text_layout.grid(row=1, column=0, columnspan=2, sticky="nsew")
+        self._build_text_layout(self.text_layout)
+
+        # Feedback
+        self.label_feedback = ctk.CTkLabel(
+            self, text="", font=(FONT_FAMILY, 24, "bold")
+        )
+        self.label_feedback.grid(row=2, column=0, columnspan=2, pady=10)
+
+        # Controls
+        self.button_next = ctk.CTkButton(
+            self, text="Next Letter", font=(FONT_FAMILY, 16), command=self.app.next_letter
+        )
+        self.button_next.grid(row=3, column=0, pady=(0, 30), sticky="e", padx=(0, 10))
+
+        self.button_home = ctk.CTkButton(
+            self, text="Back to Home", font=(FONT_FAMILY, 16), command=self.app.show_home_screen
+        )
+        self.button_home.grid(row=3, column=1, pady=(0, 30), sticky="w", padx=(10, 0))
+
+    def _build_video_layout(self, layout):
+        layout.grid_columnconfigure(0, weight=1)
+
         # Video canvas
-        self.canvas = ctk.CTkCanvas(self, width=500, height=400, bg="black")
-        self.canvas.grid(row=1, column=0, columnspan=2, pady=10)
+        self.canvas = ctk.CTkCanvas(layout, width=VIDEO_CANVAS_SIZE[0], height=VIDEO_CANVAS_SIZE[1], bg="black")
+        self.canvas.grid(row=0, column=0, pady=10)
 
         # Instruction
         self.label_instruction = ctk.CTkLabel(
-            self, text="Show the sign for the letter below:", font=(FONT_FAMILY, 18)
+            layout, text="Show the sign for the letter below:", font=(FONT_FAMILY, 18)
         )
-        self.label_instruction.grid(row=2, column=0, columnspan=2, pady=5)
+        self.label_instruction.grid(row=1, column=0, pady=5)
 
         # Target letter frame
-        self.letter_frame = ctk.CTkFrame(self)
-        self.letter_frame.grid(row=3, column=0, columnspan=2, pady=10)
+        self.letter_frame = ctk.CTkFrame(layout)
+        self.letter_frame.grid(row=2, column=0, pady=10)
         self.letter_frame.grid_columnconfigure(0, weight=1)
         self.letter_frame.grid_columnconfigure(1, weight=1)
 
@@ -61,7 +98,7 @@ class QuizScreen(ctk.CTkFrame):
         )
         self.label_target.grid(row=1, column=0, padx=20, pady=5)
 
-        # ASL target image
+        # ASL target image (easy mode only)
         self.asl_image = ctk.CTkLabel(
             self.letter_frame,
             image=self.app.blank_ctk_image,
@@ -71,9 +108,9 @@ class QuizScreen(ctk.CTkFrame):
         )
         self.asl_image.grid(row=0, column=1, rowspan=2, padx=20, pady=10)
 
-        # Prediction display
-        self.prediction_frame = ctk.CTkFrame(self)
-        self.prediction_frame.grid(row=4, column=0, columnspan=2, pady=10)
+        # Prediction display (easy mode only)
+        self.prediction_frame = ctk.CTkFrame(layout)
+        self.prediction_frame.grid(row=3, column=0, pady=10)
         self.prediction_frame.grid_columnconfigure(0, weight=1)
         self.prediction_frame.grid_columnconfigure(1, weight=1)
 
@@ -105,9 +142,28 @@ class QuizScreen(ctk.CTkFrame):
         )
         self.predicted_image.grid(row=0, column=1, rowspan=2, padx=20, pady=10)
 
-        # Text input (for image mode)
-        self.text_input_frame = ctk.CTkFrame(self)
-        self.text_input_frame.grid(row=5, column=0, columnspan=2, pady=10)
+    def _build_text_layout(self, layout):
+        layout.grid_columnconfigure(0, weight=1)
+
+        # Instruction
+        self.label_text_instruction = ctk.CTkLabel(
+            layout, text="Identify the letter shown in the image:", font=(FONT_FAMILY, 18)
+        )
+        self.label_text_instruction.grid(row=0, column=0, pady=(20, 5))
+
+        # ASL image to identify
+        self.text_image = ctk.CTkLabel(
+            layout,
+            image=self.app.blank_ctk_image,
+            text="",
+            width=200,
+            height=200
+        )
+        self.text_image.grid(row=1, column=0, pady=10)
+
+        # Text input
+        self.text_input_frame = ctk.CTkFrame(layout)
+        self.text_input_frame.grid(row=2, column=0, pady=10)
 
         self.entry_input = ctk.CTkEntry(
             self.text_input_frame,
@@ -125,22 +181,17 @@ class QuizScreen(ctk.CTkFrame):
         )
         self.button_submit.grid(row=0, column=1, padx=10, pady=10)
 
-        # Feedback
-        self.label_feedback = ctk.CTkLabel(
-            self, text="", font=(FONT_FAMILY, 24, "bold")
-        )
-        self.label_feedback.grid(row=6, column=0, columnspan=2, pady=10)
-
-        # Controls
-        self.button_next = ctk.CTkButton(
-            self, text="Next Letter", font=(FONT_FAMILY, 16), command=self.app.next_letter
-        )
-        self.button_next.grid(row=7, column=0, pady=(0, 30), sticky="e", padx=(0, 10))
-
-        self.button_home = ctk.CTkButton(
-            self, text="Back to Home", font=(FONT_FAMILY, 16), command=self.app.show_home_screen
-        )
-        self.button_home.grid(row=7, column=1, pady=(0, 30), sticky="w", padx=(10, 0))
+    def set_difficulty(self, difficulty):
+        """Configure the video layout once per quiz: hard mode hides the reference images"""
+        if difficulty == 'easy':
+            self.asl_image.grid()
+            self.prediction_frame.grid()
+            self.letter_frame.grid_columnconfigure(1, weight=1)
+        else:
+            self.asl_image.grid_remove()
+            self.prediction_frame.grid_remove()
+            # Center the target letter in the frame (since image is hidden)
+            self.letter_frame.grid_columnconfigure(1, weight=0)
 
     def video_text_selector(self, epsilon=0.3):
         if random.random() < epsilon:
@@ -168,20 +219,33 @@ class QuizScreen(ctk.CTkFrame):
         return 'video' if random.random() < p_video else 'text'
 
     def select_next_letter(self, t="text", epsilon=0.3):
+        # 0) motion letters can only be asked in video mode and if the detector supports them,
+        #    text mode sticks to the letters with a reference image
+        letters = self.app.detector.letters if t == 'video' else ASL_CLASS_NAMES
+
         # 1) with small chance, pick any letter at random
         if random.random() < epsilon:
-            return random.choice(ASL_CLASS_NAMES)
+            return random.choice(letters)
 
-        # 2) build weights = text_errors
+        # 2) with some chance, drill the letter most often confused with the previous one (e.g. N after M)
+        if random.random() < CONFUSION_PAIR_PROBABILITY:
+            partner = self.app.confusion.partner(self.target_letter, letters)
+            if partner:
+                return partner
+
+        # 3) build weights = text_errors, raised for letters the detector often mistakes for another
+        confusability = self.app.confusion.confusability(letters)
         weights = []
-        for ltr in ASL_CLASS_NAMES:
+        for ltr, conf in zip(letters, confusability):
             te = errors['letters'][ltr][t + '_errors']
-            weights.append(te)
+            weights.append(te * (1 + CONFUSION_WEIGHT * conf))
 
-        # 3) randomly choose a letter weighted by its errors
-        return random.choices(ASL_CLASS_NAMES, weights=weights, k=1)[0]
+        # 4) randomly choose a letter weighted by its errors
+        return random.choices(letters, weights=weights, k=1)[0]
 
     def next_letter(self, difficulty):
+        transition_start = time.perf_counter()
+
         # Update errors if needed
         if self.timer != 0:
             self.update_video_error()
@@ -190,28 +254,18 @@ class QuizScreen(ctk.CTkFrame):
 
         # Reset video_completed flag for new letter
         self.video_completed = False
-
-        # Hide all optional UI elements
-        self.prediction_frame.grid_remove()
-        self.text_input_frame.grid_remove()
         self.label_feedback.configure(text="")
 
-        # Reset displays
-        self.label_target.configure(text="")
-        self.predicted_letter.configure(text="")
-        self.asl_image.configure(image=self.app.blank_ctk_image, text="")
-        self.predicted_image.configure(image=self.app.blank_ctk_image, text="")
-
         # Pick mode and letter
         self.test_mode = self.video_text_selector()
         self.target_letter = self.select_next_letter(self.test_mode)
+        self.question_start = time.time()
 
         if self.test_mode == 'video':
             self.timer = time.time()
-            # Show camera & prompt
-            self.canvas.grid()
-            self.label_instruction.configure(text="Show the sign for the letter below:")
             self.label_target.configure(text=self.target_letter)
+            self.predicted_letter.configure(text="")
+            self.predicted_image.configure(image=self.app.blank_ctk_image, text="")
 
             if difficulty == 'easy':
                 # Show target image in easy mode
@@ -220,47 +274,47 @@ class QuizScreen(ctk.CTkFrame):
                     image=img_t or self.app.blank_ctk_image,
                     text="" if img_t else "Image not found"
                 )
-                # Show prediction frame for easy mode
-                self.prediction_frame.grid()
-            else:
-                # Hard mode - explicitly hide the image area
-                self.asl_image.grid_remove()
-                # Center the target letter in the frame (since image is hidden)
-                self.letter_frame.grid_columnconfigure(1, weight=0)  # Remove weight from image column
+            self.video_layout.tkraise()
         else:
             # Static image test mode
             self.number_attempts = 0
-            self.canvas.grid_remove()
-            self.label_instruction.configure(text="Identify the letter shown in the image:")
-
-            # Show image and input controls
             img = load_asl_letter_image(self.target_letter)
-            self.asl_image.grid()  # Make sure image is visible for text mode
-            self.letter_frame.grid_columnconfigure(1, weight=1)  # Restore image column weight
-            self.asl_image.configure(
+            self.text_image.configure(
                 image=img or self.app.blank_ctk_image,
                 text="" if img else "Image not found"
             )
-
-            # Show text input controls
-            self.text_input_frame.grid()
             self.entry_input.delete(0, ctk.END)
+            self.text_layout.tkraise()
             self.entry_input.focus_set()
 
-        self.app._adjust_window_size()
+        if MEASURE_TRANSITIONS:
+            self.after_idle(self._record_transition, transition_start)
+
+    def _record_transition(self, transition_start):
+        """Log how long the question change took, including the pending layout work"""
+        self.update_idletasks()
+        self.transition_times.append((time.perf_counter() - transition_start) * 1000)
+        mean = sum(self.transition_times) / len(self.transition_times)
+        logger.info("Question transition: %.1f ms (mean %.1f ms over %d)",
+                    self.transition_times[-1], mean, len(self.transition_times))
 
-    def update_prediction(self, predicted_letter):
+    def update_prediction(self, predicted_letter, landmarks=None, probabilities=None):
         # Process predictions only in video mode
         if self.test_mode == 'video':
             if self.video_completed:
                 return  # Ignore further predictions until next letter
 
+            self.app.record_hard_example(landmarks, self.target_letter, predicted_letter, probabilities)
+            self.app.record_prediction(self.target_letter, predicted_letter)
+
             # Always update the predicted letter text
             self.predicted_letter.configure(text=predicted_letter)
 
             if predicted_letter == self.target_letter:
                 self.label_feedback.configure(text="Correct!", text_color="green")
                 self.update_video_error(correct=True)
+                self.app.record_correct(self.target_letter)
+                self.app.detector.confirm_letter(predicted_letter)
                 self.video_completed = True  # Mark as completed
                 self.after(1000, self.app.next_letter)
             else:
@@ -281,9 +335,9 @@ class QuizScreen(ctk.CTkFrame):
             self.predicted_image.configure(image=self.app.blank_ctk_image, text="")
             self.label_feedback.configure(text="No hand detected", text_color="orange")
 
-    def update_canvas(self, frame):
+    def update_canvas(self, frame, landmarks=None):
         if self.test_mode == 'video':
-            imgtk = process_frame(frame)
+            imgtk = process_frame(frame, landmarks)
             self.canvas.create_image(0, 0, anchor="nw", image=imgtk)
             self.canvas.imgtk = imgtk
 
@@ -307,6 +361,8 @@ class QuizScreen(ctk.CTkFrame):
         errors['text_total_errors'] += add
         errors['text_tests'] += 1
         errors['letters'][self.target_letter]['text_errors'] += add
+        self.app.record_attempt('text', self.target_letter, correct, time.time() - self.question_start, add,
+                                tries=self.number_attempts)
         self.number_attempts = 0
         print(errors)
 
@@ -318,5 +374,6 @@ class QuizScreen(ctk.CTkFrame):
         errors['video_total_errors'] += add
         errors['video_tests'] += 1
         errors['letters'][self.target_letter]['video_errors'] += add
+        self.app.record_attempt('video', self.target_letter, correct, time.time() - self.question_start, add)
         self.timer = 0
         print(errors)
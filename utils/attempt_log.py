@@ -0,0 +1,57 @@
+import os
+import time
+
+import numpy as np
+
+from config import ASL_ALPHABET
+
+MAGIC = b"ASLATTM1"
+MODES = ("text", "video", "phrase")
+
+# One fixed-size record per answered question (20 bytes), appended after the magic header
+ATTEMPT_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("mode", "u1"),  # index in MODES
+    ("target", "u1"),  # index in ASL_ALPHABET
+    ("correct", "u1"),
+    ("tries", "u1"),  # wrong answers before this one (text mode)
+    ("duration", "<f4"),  # seconds from showing the question to the answer
+    ("error", "<f4"),  # error score added to config.errors for this attempt
+])
+
+
+def load_attempts(path):
+    """Returns: all records of an attempt log as a NumPy structured array"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an attempt log")
+    return np.fromfile(path, dtype=ATTEMPT_DTYPE, offset=len(MAGIC))
+
+
+class AttemptLog:
+    """
+    Appends one record per answered question to the learner's attempt log.
+    Questions are answered a few times a minute at most, so records are written right away.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+
+    def record(self, mode, target, correct, duration, error, tries=0):
+        """Returns: the record that was written, or None if the target isn't a letter"""
+        if target not in ASL_ALPHABET:
+            return None
+        record = np.zeros(1, dtype=ATTEMPT_DTYPE)
+        record["timestamp"] = time.time()
+        record["mode"] = MODES.index(mode)
+        record["target"] = ASL_ALPHABET.index(target)
+        record["correct"] = bool(correct)
+        record["tries"] = min(tries, 255)
+        record["duration"] = duration
+        record["error"] = error
+        with open(self.path, "ab") as f:
+            record.tofile(f)
+        return record[0]
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+
+import cv2
+
+from config import CAMERA_INDEX, CAMERA_PROFILES, CAMERA_MIN_BUFFER, CAMERA_PROBE_FRAMES, CAMERA_PROBE_CACHE
+
+PROBE_WARMUP_FRAMES = 5  # the first frames after opening are often slow or dark
+PROBE_FRAME_TIMEOUT_S = 1.0  # give up on a profile that delivers no frame for this long
+
+logger = logging.getLogger(__name__)
+
+
+class LatestFrameCapture:
+    """
+    Reads the camera on a background thread and keeps only the newest frame, so the UI always
+    processes the freshest image instead of one that waited in the driver's queue.
+    read() returns (False, None) when no new frame arrived since the previous call.
+    """
+
+    def __init__(self, cap):
+        self.cap = cap
+        self.lock = threading.Lock()
+        self.frame = None
+        self.timestamp = 0.0  # perf_counter() when the driver delivered the frame
+        self.fresh = False
+        self.running = True
+        self.thread = threading.Thread(target=self._reader, daemon=True)
+        self.thread.start()
+
+    def _reader(self):
+        while self.running:
+            success, frame = self.cap.read()
+            if not success:
+                time.sleep(0.005)
+                continue
+            with self.lock:
+                self.frame = frame
+                self.timestamp = time.perf_counter()
+                self.fresh = True
+
+    def read(self):
+        success, frame, _ = self.read_timestamped()
+        return success, frame
+
+    def read_timestamped(self):
+        """Returns: (success, frame, time the frame was delivered by the driver)"""
+        with self.lock:
+            if not self.fresh:
+                return False, None, None
+            self.fresh = False
+            return True, self.frame, self.timestamp
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def get(self, prop):
+        return self.cap.get(prop)
+
+    def release(self):
+        # Wait until the reader is out of cap.read(), releasing under it can crash the backend
+        self.running = False
+        self.thread.join()
+        self.cap.release()
+
+
+def apply_profile(cap, profile):
+    """
+    Request the profile's settings from the driver.
+    Returns: the (width, height, fps, fourcc) that were actually negotiated
+    """
+    # The codec has to be set before the resolution for some drivers (e.g. V4L2) to honour it
+    if profile.get("fourcc"):
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*profile["fourcc"]))
+    if profile.get("width"):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, profile["width"])
+    if profile.get("height"):
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, profile["height"])
+    if profile.get("fps"):
+        cap.set(cv2.CAP_PROP_FPS, profile["fps"])
+
+    fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+    return (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            cap.get(cv2.CAP_PROP_FPS), "".join(chr((fourcc >> 8 * i) & 0xFF) for i in range(4)))
+
+
+def open_camera(index=CAMERA_INDEX, profile=None, min_buffer=CAMERA_MIN_BUFFER):
+    """Open the camera with an optional profile from CAMERA_PROFILES (None keeps driver defaults)"""
+    cap = cv2.VideoCapture(index)
+    if not cap.isOpened():
+        raise RuntimeError("Could not open webcam")
+    if profile:
+        apply_profile(cap, profile)
+    if min_buffer:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # not every backend supports it, hence the reader thread
+        return LatestFrameCapture(cap)
+    return cap
+
+
+def probe_profiles(index=CAMERA_INDEX, profiles=CAMERA_PROFILES, frames=CAMERA_PROBE_FRAMES, process=None):
+    """
+    Try every profile and measure the latency the app sees: from the moment the driver delivers
+    the newest frame to the moment it is flipped and, if given, `process`ed (e.g. by
+    HandDetector.process_frame, whose cost grows with the resolution), plus the half frame
+    interval a new image waits on average before it is delivered.
+    Profiles the camera can't deliver at the requested resolution are skipped.
+    Returns: name of the profile with the lowest median latency, or None if none worked
+    """
+    best_name, best_latency = None, float("inf")
+    for name, profile in profiles.items():
+        cap = cv2.VideoCapture(index)
+        if not cap.isOpened():
+            continue
+        width, height, fps, fourcc = apply_profile(cap, profile)
+        if (width, height) != (profile["width"], profile["height"]):
+            logger.info("Camera profile %s: not supported (got %dx%d)", name, width, height)
+            cap.release()
+            continue
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        capture = LatestFrameCapture(cap)
+        latencies = []
+        try:
+            for i in range(PROBE_WARMUP_FRAMES + frames):
+                deadline = time.perf_counter() + PROBE_FRAME_TIMEOUT_S
+                success, frame, delivered = capture.read_timestamped()
+                while not success and time.perf_counter() < deadline:
+                    time.sleep(0.001)
+                    success, frame, delivered = capture.read_timestamped()
+                if not success:
+                    break
+                frame = cv2.flip(frame, 1)
+                if process:
+                    process(frame)
+                if i >= PROBE_WARMUP_FRAMES:
+                    latencies.append(time.perf_counter() - delivered)
+        finally:
+            capture.release()
+        if not latencies:
+            continue
+
+        latency = statistics.median(latencies) + (0.5 / fps if fps > 0 else 0.0)
+        logger.info("Camera profile %s: %dx%d %s @ %.0f FPS, %.1f ms latency",
+                    name, width, height, fourcc, fps, latency * 1000)
+        if latency < best_latency:
+            best_name, best_latency = name, latency
+    return best_name
+
+
+def probed_profile(index=CAMERA_INDEX, process=None, cache_path=CAMERA_PROBE_CACHE):
+    """
+    Returns: the profile probe_profiles() picks for camera `index`. The pick is kept in
+    `cache_path`, so each camera is only probed the first time it is used.
+    """
+    picks = {}
+    if os.path.exists(cache_path):
+        with open(cache_path) as f:
+            picks = json.load(f)
+    name = picks.get(str(index))
+    if name in CAMERA_PROFILES:
+        return name
+
+    name = probe_profiles(index, process=process)
+    if name is not None:
+        picks[str(index)] = name
+        with open(cache_path, "w") as f:
+            json.dump(picks, f, indent=2)
+    return name
@@ -0,0 +1,86 @@
+import os
+
+import numpy as np
+
+from config import ASL_ALPHABET, CONFUSION_STABLE_FRAMES
+
+_INDEX = {ltr: i for i, ltr in enumerate(ASL_ALPHABET)}
+
+
+class ConfusionTracker:
+    """
+    Counts, per target letter, which letter the detector recognized.
+
+    The counts live in one preallocated (26, 26) array indexed by ASL_ALPHABET (rows are targets,
+    columns predictions), so each update is a single increment. Wrong predictions are counted
+    once stable: a (target, prediction) pair has to be seen on CONFUSION_STABLE_FRAMES consecutive
+    frames, and is then counted once until the pair changes. The screens move on at the first
+    correct frame, so correct answers are counted on the diagonal by record_correct() instead.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.counts = np.zeros((len(ASL_ALPHABET), len(ASL_ALPHABET)), dtype=np.int32)
+        self.run = None  # (target index, predicted index) being observed
+        self.run_length = 0
+        if os.path.exists(path):
+            self._load()
+
+    def observe(self, target, predicted):
+        """Feed one frame's prediction, a wrong one is counted once it has been stable long enough"""
+        t, p = _INDEX.get(target), _INDEX.get(predicted)
+        if t is None or p is None or t == p:
+            return
+        if self.run != (t, p):
+            self.run, self.run_length = (t, p), 0
+        self.run_length += 1
+        if self.run_length == CONFUSION_STABLE_FRAMES:
+            self.counts[t, p] += 1
+
+    def record_correct(self, target):
+        """The learner signed `target` correctly"""
+        t = _INDEX.get(target)
+        if t is None:
+            return
+        self.counts[t, t] += 1
+        self.run, self.run_length = None, 0
+
+    def confusions(self):
+        """Returns: symmetric matrix of how often each pair of different letters was mixed up"""
+        off_diagonal = self.counts + self.counts.T
+        np.fill_diagonal(off_diagonal, 0)
+        return off_diagonal
+
+    def confused_pairs(self, k=5):
+        """Returns: up to k (letter, letter, count) tuples, most often confused pairs first"""
+        upper = np.triu(self.confusions(), 1)
+        flat = np.argsort(upper, axis=None)[::-1][:k]
+        rows, cols = np.unravel_index(flat, upper.shape)
+        return [(ASL_ALPHABET[i], ASL_ALPHABET[j], int(upper[i, j])) for i, j in zip(rows, cols) if upper[i, j]]
+
+    def partner(self, letter, candidates=ASL_ALPHABET):
+        """Returns: the candidate most often confused with `letter`, or None if there is none"""
+        if letter not in _INDEX:
+            return None
+        row = self.confusions()[_INDEX[letter]]
+        best = max(candidates, key=lambda ltr: row[_INDEX[ltr]] if ltr in _INDEX else -1)
+        return best if best in _INDEX and row[_INDEX[best]] > 0 else None
+
+    def confusability(self, letters):
+        """Returns: for each of `letters`, the share of its counted predictions that were wrong"""
+        idx = [_INDEX[ltr] for ltr in letters]
+        totals = self.counts[idx].sum(axis=1)
+        wrong = totals - self.counts[idx, idx]
+        return wrong / np.maximum(totals, 1)
+
+    def _load(self):
+        counts = np.load(self.path)
+        if counts.shape == self.counts.shape:
+            self.counts[:] = counts
+
+    def save(self):
+        # Written to a temporary file first so a crash never leaves a truncated matrix behind
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, self.counts)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,125 @@
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+from config import (ASL_ALPHABET, ASL_CLASS_NAMES, HARD_EXAMPLES_PATH, HARD_EXAMPLE_CONFIDENCE,
+                    HARD_EXAMPLE_DEDUP_TOLERANCE, HARD_EXAMPLE_QUEUE_SIZE)
+
+MAGIC = b"ASLHARD2"
+NO_LETTER = 255
+
+# One fixed-size record per captured frame (314 bytes), appended after the magic header
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("target", "u1"),  # index in ASL_ALPHABET
+    ("predicted", "u1"),  # index in ASL_ALPHABET, NO_LETTER if unknown
+    ("landmarks", "<f4", (63,)),
+    ("probabilities", "<f2", (len(ASL_CLASS_NAMES),)),  # static model output, 0 if unavailable
+    # Probability of the target letter, tells confidently wrong frames from unsure ones;
+    # NaN if there were no probabilities or the target is a motion letter
+    ("target_probability", "<f4"),
+])
+
+
+def _letter_code(letter):
+    return ASL_ALPHABET.index(letter) if letter in ASL_ALPHABET else NO_LETTER
+
+
+def _target_probability(target, probabilities):
+    if probabilities is None or target not in ASL_CLASS_NAMES:
+        return np.nan
+    return float(probabilities[ASL_CLASS_NAMES.index(target)])
+
+
+def _confidence(predicted, probabilities):
+    """Confidence of the prediction made; J and Z come from the motion model, not these probabilities"""
+    if probabilities is None or predicted not in ASL_CLASS_NAMES:
+        return 1.0
+    return float(probabilities[ASL_CLASS_NAMES.index(predicted)])
+
+
+def load_hard_examples(path=HARD_EXAMPLES_PATH):
+    """Returns: all records of the store as a NumPy structured array"""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a hard-example store")
+    return np.fromfile(path, dtype=RECORD_DTYPE, offset=len(MAGIC))
+
+
+class HardExampleRecorder:
+    """
+    Keeps misclassified and low-confidence frames for retraining.
+
+    record() runs on the UI thread and only filters, de-duplicates and enqueues; a background
+    thread packs the records and appends them to the store. The queue is bounded, so when the
+    disk can't keep up samples are dropped instead of piling up in memory.
+    """
+
+    def __init__(self, path=HARD_EXAMPLES_PATH):
+        self.path = path
+        self.queue = queue.Queue(maxsize=HARD_EXAMPLE_QUEUE_SIZE)
+        self.last = None  # (target, predicted, landmarks) of the last captured frame
+        self.dropped = 0
+        self.written = 0
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, "wb") as f:
+                f.write(MAGIC)
+
+        self.thread = threading.Thread(target=self._writer_loop, daemon=True)
+        self.thread.start()
+
+    def record(self, landmarks, target, predicted, probabilities=None):
+        """Capture the frame if the prediction is wrong or unsure and not a repeat of the last one"""
+        if landmarks is None or target is None:
+            return
+        if predicted == target and _confidence(predicted, probabilities) >= HARD_EXAMPLE_CONFIDENCE:
+            return
+
+        # Skip frames that are practically the same as the last captured one
+        landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1)
+        if self.last is not None and self.last[:2] == (target, predicted) \
+                and np.max(np.abs(landmarks - self.last[2])) < HARD_EXAMPLE_DEDUP_TOLERANCE:
+            return
+        self.last = (target, predicted, landmarks)
+
+        try:
+            self.queue.put_nowait((time.time(), target, predicted, landmarks, probabilities))
+        except queue.Full:
+            self.dropped += 1
+
+    def _writer_loop(self):
+        while True:
+            items = [self.queue.get()]
+            # Take whatever else is waiting so that one write covers several records
+            while not self.queue.empty():
+                items.append(self.queue.get_nowait())
+
+            stop = items[-1] is None
+            items = [item for item in items if item is not None]
+            if items:
+                self._append(items)
+            if stop:
+                break
+
+    def _append(self, items):
+        records = np.zeros(len(items), dtype=RECORD_DTYPE)
+        for record, (timestamp, target, predicted, landmarks, probabilities) in zip(records, items):
+            record["timestamp"] = timestamp
+            record["target"] = _letter_code(target)
+            record["predicted"] = _letter_code(predicted)
+            record["landmarks"] = landmarks
+            if probabilities is not None:
+                record["probabilities"] = probabilities
+            record["target_probability"] = _target_probability(target, probabilities)
+        with open(self.path, "ab") as f:
+            records.tofile(f)
+        self.written += len(records)
+
+    def close(self):
+        """Flush pending records and stop the writer"""
+        self.queue.put(None)
+        self.thread.join()
@@ -4,7 +4,8 @@ import customtkinter as ctk
 import cv2
 from PIL import Image, ImageTk
 
-from config import IMAGES_DIR
+from config import IMAGES_DIR, VIDEO_CANVAS_SIZE
+from utils.landmark_renderer import draw_landmarks
 
 
 def create_blank_image(size=(200, 200)):
@@ -34,8 +35,17 @@ def load_asl_letter_image(letter, size=(200, 200)):
     return create_ctk_image(processed_img, size)
 
 
-def process_frame(frame):
+def process_frame(frame, landmarks=None, size=VIDEO_CANVAS_SIZE):
     """ Process webcam frame for display, from np.ndarray to ImageTk.PhotoImage """
+    # Scale down to fit the canvas (keeping the aspect ratio) before drawing the overlay
+    height, width = frame.shape[:2]
+    scale = min(size[0] / width, size[1] / height, 1.0)
+    if scale < 1.0:
+        frame = cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    else:
+        frame = frame.copy()  # the capture frame itself is never drawn on
+
+    draw_landmarks(frame, landmarks)
     frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
     img = Image.fromarray(frame)
     return ImageTk.PhotoImage(image=img)
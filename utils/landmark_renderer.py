@@ -0,0 +1,37 @@
+import cv2
+import numpy as np
+
+from config import LANDMARK_STYLE
+
+# Same topology as mediapipe.solutions.hands.HAND_CONNECTIONS
+HAND_CONNECTIONS = np.array([
+    (0, 1), (1, 2), (2, 3), (3, 4),
+    (0, 5), (5, 6), (6, 7), (7, 8),
+    (5, 9), (9, 10), (10, 11), (11, 12),
+    (9, 13), (13, 14), (14, 15), (15, 16),
+    (13, 17), (17, 18), (18, 19), (19, 20), (0, 17)
+])
+
+
+def draw_landmarks(image, landmarks, style=LANDMARK_STYLE):
+    """
+    Draw a hand skeleton in place on `image` (any size) from normalized landmarks,
+    as returned by HandDetector.extract_landmarks. Nothing is drawn if style is None.
+    """
+    if landmarks is None or style is None:
+        return image
+
+    # Normalized coordinates to pixels, once for all points
+    height, width = image.shape[:2]
+    points = np.asarray(landmarks, dtype=np.float32).reshape(-1, 3)[:, :2] * (width, height)
+    points = points.astype(np.int32)
+
+    # All connections in a single call, one two-point polyline each
+    cv2.polylines(image, points[HAND_CONNECTIONS], False, style["connection_color"],
+                  style["connection_thickness"], cv2.LINE_AA)
+
+    # Zero-length thick segments are drawn as round dots, so all landmarks also take one call
+    dots = np.repeat(points[:, None, :], 2, axis=1)
+    cv2.polylines(image, dots, False, style["landmark_color"],
+                  2 * style["landmark_radius"] + 1, cv2.LINE_AA)
+    return image
@@ -0,0 +1,24 @@
+import os
+
+from config import PROFILES_DIR, LEARNER_NAME
+
+_current_learner = LEARNER_NAME
+
+
+def current_learner():
+    return _current_learner
+
+
+def set_learner(name):
+    """Switch the active learner; files written afterwards go to their profile"""
+    global _current_learner
+    # The name becomes a directory, so keep it from pointing anywhere else
+    name = "".join(c for c in name.strip() if c.isalnum() or c in " -_")
+    _current_learner = name or LEARNER_NAME
+
+
+def profile_path(filename, learner=None):
+    """ Returns: path of a file in the learner's profile directory (created if needed) """
+    directory = os.path.join(PROFILES_DIR, learner or _current_learner)
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, filename)
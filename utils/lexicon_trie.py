@@ -0,0 +1,133 @@
+import argparse
+import mmap
+import struct
+from array import array
+
+MAGIC = b"ASLTRIE1"
+HEADER = struct.Struct("<8sI")  # magic, node count
+
+
+class LexiconTrie:
+    """
+    Read-only trie over a word list, backed by a memory-mapped binary file.
+
+    Nodes are stored in breadth-first order so that the children of a node are contiguous
+    and sorted by label. Each node is described by four parallel arrays:
+        child_start (uint32)  index of the first child
+        child_count (uint8)   number of children
+        label       (uint8)   letter on the edge leading into the node
+        is_word     (uint8)   1 if the path from the root spells a complete word
+    Opening the file only maps it, so a 100k-word lexicon is available immediately.
+    """
+
+    ROOT = 0
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.node_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled lexicon")
+
+        n = self.node_count
+        view = memoryview(self._mmap)
+        offset = HEADER.size
+        self.child_start = view[offset:offset + 4 * n].cast("I")
+        offset += 4 * n
+        self.child_count = view[offset:offset + n]
+        offset += n
+        self.label = view[offset:offset + n]
+        offset += n
+        self.is_word = view[offset:offset + n]
+
+    def child(self, node, letter):
+        """Returns: index of the child of `node` reached through `letter`, or None"""
+        code = ord(letter)
+        start = self.child_start[node]
+        for i in range(start, start + self.child_count[node]):
+            if self.label[i] == code:
+                return i
+        return None
+
+    def children(self, node):
+        """Yields (letter, child index) pairs for all children of `node`"""
+        start = self.child_start[node]
+        for i in range(start, start + self.child_count[node]):
+            yield chr(self.label[i]), i
+
+    def is_terminal(self, node):
+        return self.is_word[node] == 1
+
+    def __contains__(self, word):
+        node = self.ROOT
+        for letter in word:
+            node = self.child(node, letter)
+            if node is None:
+                return False
+        return self.is_terminal(node)
+
+    def close(self):
+        for arr in (self.child_start, self.child_count, self.label, self.is_word):
+            arr.release()
+        self._mmap.close()
+        self._file.close()
+
+
+def compile_lexicon(words, path):
+    """Build the trie for `words` (uppercase A-Z only are kept) and write it to `path`"""
+    # Build a nested dict trie; the None key marks the end of a word
+    root = {}
+    for word in words:
+        word = word.strip().upper()
+        if not word or not word.isascii() or not word.isalpha():
+            continue
+        node = root
+        for letter in word:
+            node = node.setdefault(letter, {})
+        node[None] = True
+
+    # Flatten breadth-first so that siblings are stored contiguously
+    child_start = array("I")
+    child_count = bytearray()
+    labels = bytearray()
+    is_word = bytearray()
+
+    queue = [(0, root)]
+    next_index = 1
+    for _, node in _iter_queue(queue):
+        letters = sorted(k for k in node if k is not None)
+        child_start.append(next_index)
+        child_count.append(len(letters))
+        is_word.append(1 if None in node else 0)
+        for letter in letters:
+            queue.append((ord(letter), node[letter]))
+        next_index += len(letters)
+
+    labels.extend(code for code, _ in queue)
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(queue)))
+        f.write(child_start.tobytes())
+        f.write(child_count)
+        f.write(labels)
+        f.write(is_word)
+    return len(queue)
+
+
+def _iter_queue(queue):
+    """Iterate over a list that keeps growing while it is being consumed"""
+    i = 0
+    while i < len(queue):
+        yield queue[i]
+        i += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a word list into a binary lexicon trie")
+    parser.add_argument("words", help="text file with one word per line")
+    parser.add_argument("output", help="path of the compiled lexicon")
+    args = parser.parse_args()
+
+    with open(args.words, encoding="utf-8") as word_file:
+        count = compile_lexicon(word_file, args.output)
+    print(f"Wrote {count} trie nodes to {args.output}")
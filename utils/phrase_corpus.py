@@ -0,0 +1,182 @@
+import argparse
+import mmap
+import string
+import struct
+from array import array
+
+import numpy as np
+
+MAGIC = b"ASLPHRS1"
+HEADER = struct.Struct("<8sII")  # magic, phrase count, posting count (16 bytes)
+LETTERS = string.ascii_uppercase
+N_LETTERS = len(LETTERS)
+FIRST_BLOCK = 64  # postings read per letter in the first round, doubled every round
+
+
+class PhraseCorpus:
+    """
+    Read-only phrase corpus with a letter-frequency index, backed by a memory-mapped file.
+
+    Sections, in order, after the 16-byte header (8-byte fields first so every section stays
+    aligned to its item size):
+        text_offsets  uint64[n + 1]    byte offsets of each phrase in the text blob
+        posting_dir   uint64[27]       start of each letter's posting list
+        posting_ids   uint32[m]        phrase ids, per letter sorted by frequency (desc)
+        posting_freq  float32[m]       letter count / phrase length for the ids above
+        lengths       uint16[n]        number of letters in each phrase
+        counts        uint8[n * 26]    per-phrase letter counts
+        text          utf-8            all phrases back to back
+    Queries only walk the top of the posting lists of the weighted letters (Fagin's threshold
+    algorithm), so they stay fast no matter how many phrases the corpus holds. The lists are
+    read in growing blocks and each block is scored with NumPy at once.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.phrase_count, posting_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled phrase corpus")
+
+        n, m = self.phrase_count, posting_count
+        offset = HEADER.size
+        for name, dtype, count in (
+                ("text_offsets", np.uint64, n + 1),
+                ("posting_dir", np.uint64, N_LETTERS + 1),
+                ("posting_ids", np.uint32, m),
+                ("posting_freq", np.float32, m),
+                ("lengths", np.uint16, n),
+                ("counts", np.uint8, n * N_LETTERS)):
+            section = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+            setattr(self, name, section)
+            offset += section.nbytes
+        self.counts = self.counts.reshape(n, N_LETTERS)
+        self.text = np.frombuffer(self._mmap, dtype=np.uint8, offset=offset)
+
+    def __len__(self):
+        return self.phrase_count
+
+    def phrase(self, phrase_id):
+        start, end = int(self.text_offsets[phrase_id]), int(self.text_offsets[phrase_id + 1])
+        return self.text[start:end].tobytes().decode("utf-8")
+
+    def _scores(self, phrase_ids, letters, weights):
+        """Returns: weighted letter frequency of each phrase in `phrase_ids`"""
+        counts = self.counts[phrase_ids][:, letters].astype(np.float32)
+        lengths = np.maximum(self.lengths[phrase_ids], 1)
+        return counts @ weights / lengths
+
+    def best_phrase_ids(self, letter_weights, k=10):
+        """
+        Returns: ids of the k phrases with the highest weighted letter frequency,
+        where `letter_weights` maps letters to non-negative weights
+        """
+        weighted = [(LETTERS.index(ltr), w) for ltr, w in letter_weights.items() if w > 0 and ltr in LETTERS]
+        if not weighted or k <= 0:
+            return []
+        letters = np.array([i for i, _ in weighted])
+        weights = np.array([w for _, w in weighted], dtype=np.float32)
+        starts = self.posting_dir[letters].astype(np.int64)
+        ends = self.posting_dir[letters + 1].astype(np.int64)
+
+        top_ids = np.zeros(0, dtype=np.uint32)
+        top_scores = np.zeros(0, dtype=np.float32)
+        seen = np.zeros(self.phrase_count, dtype=bool)  # phrases scored so far
+        depth, block = 0, FIRST_BLOCK
+        while True:
+            # Sorted access: the next block of every weighted letter's posting list
+            lows = np.minimum(starts + depth, ends)
+            highs = np.minimum(lows + block, ends)
+            candidates = np.concatenate([self.posting_ids[lo:hi] for lo, hi in zip(lows, highs)])
+            candidates = np.sort(candidates[~seen[candidates]])
+            candidates = candidates[np.r_[True, candidates[1:] != candidates[:-1]]]
+            if len(candidates):
+                # Random access: score the new phrases and keep the k best overall
+                seen[candidates] = True
+                top_ids = np.concatenate((top_ids, candidates))
+                top_scores = np.concatenate((top_scores, self._scores(candidates, letters, weights)))
+                if len(top_ids) > k:
+                    keep = np.argpartition(-top_scores, k - 1)[:k]
+                    top_ids, top_scores = top_ids[keep], top_scores[keep]
+
+            # An unseen phrase scores at most the frequencies at the end of each block,
+            # or nothing for a letter whose list is used up
+            exhausted = highs >= ends
+            last = np.where(exhausted, 0, highs - 1)
+            threshold = float(np.sum(np.where(exhausted, 0.0, weights * self.posting_freq[last])))
+            if exhausted.all() or (len(top_ids) == k and top_scores.min() >= threshold):
+                break
+            depth += block
+            block *= 2
+
+        order = np.lexsort((top_ids, -top_scores))
+        return top_ids[order].tolist()
+
+    def weak_letter_phrases(self, letter_errors, k=10):
+        """Returns: up to k phrases that best cover the letters with above-average errors"""
+        mean = sum(letter_errors.values()) / len(letter_errors)
+        weights = {ltr: err - mean for ltr, err in letter_errors.items()}
+        return [self.phrase(i) for i in self.best_phrase_ids(weights, k)]
+
+    def close(self):
+        # The arrays point into the map, which can only be closed once they are gone
+        self.text_offsets = self.posting_dir = self.posting_ids = self.posting_freq = None
+        self.lengths = self.counts = self.text = None
+        self._mmap.close()
+        self._file.close()
+
+
+def compile_corpus(phrases, path):
+    """Index `phrases` (one per item, uppercased) and write the corpus to `path`"""
+    text_offsets = array("Q", [0])
+    lengths = array("H")
+    counts = bytearray()
+    postings = [[] for _ in range(N_LETTERS)]
+    text = bytearray()
+
+    for phrase in phrases:
+        phrase = " ".join(phrase.upper().split())
+        letter_counts = [0] * N_LETTERS
+        for c in phrase:
+            if "A" <= c <= "Z":
+                letter_counts[ord(c) - 65] += 1
+        length = sum(letter_counts)
+        if length == 0:
+            continue
+
+        phrase_id = len(lengths)
+        lengths.append(min(length, 0xFFFF))
+        counts.extend(min(c, 0xFF) for c in letter_counts)
+        for i, c in enumerate(letter_counts):
+            if c:
+                postings[i].append((c / length, phrase_id))
+        text.extend(phrase.encode("utf-8"))
+        text_offsets.append(len(text))
+
+    posting_dir = array("Q", [0])
+    posting_ids = array("I")
+    posting_freq = array("f")
+    for letter_postings in postings:
+        letter_postings.sort(key=lambda p: -p[0])
+        posting_ids.extend(phrase_id for _, phrase_id in letter_postings)
+        posting_freq.extend(freq for freq, _ in letter_postings)
+        posting_dir.append(len(posting_ids))
+
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, len(lengths), len(posting_ids)))
+        for section in (text_offsets, posting_dir, posting_ids, posting_freq, lengths):
+            f.write(section.tobytes())
+        f.write(counts)
+        f.write(text)
+    return len(lengths)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a phrase list into an indexed phrase corpus")
+    parser.add_argument("phrases", help="text file with one phrase per line")
+    parser.add_argument("output", help="path of the compiled corpus")
+    args = parser.parse_args()
+
+    with open(args.phrases, encoding="utf-8") as phrase_file:
+        count = compile_corpus(phrase_file, args.output)
+    print(f"Indexed {count} phrases into {args.output}")
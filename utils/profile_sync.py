@@ -0,0 +1,407 @@
+"""
+Sync of the learners' attempt records with a collection service shared by several stations.
+
+Records are queued by the UI thread and uploaded by a background thread in zlib-compressed
+batches of raw ATTEMPT_DTYPE records. The endpoint is either HTTP ("http://host:port") or a plain
+TCP socket ("tcp://host:port"). Run a stand-in collection service serving both with:
+
+    python -m utils.profile_sync --http-port 50632 --tcp-port 50633
+"""
+import argparse
+import glob
+import http.client
+import logging
+import os
+import queue
+import random
+import socket
+import socketserver
+import struct
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from config import (ASL_ALPHABET, ATTEMPTS_FILE, PROFILES_DIR, SYNC_ENDPOINT, SYNC_BATCH_SIZE, SYNC_INTERVAL_S, SYNC_QUEUE_SIZE,
+                    SYNC_MAX_PENDING, SYNC_TIMEOUT_S, SYNC_BACKOFF_S, SYNC_BACKOFF_MAX_S,
+                    SYNC_SPOOL_FILE, SYNC_SERVER_DIR)
+from utils.attempt_log import ATTEMPT_DTYPE, MAGIC, MODES, load_attempts
+from utils.learner_profile import profile_path
+
+# TCP wire format: a request header (operation, learner name length, `before` timestamp, payload
+# length) followed by the learner name and the payload; answered with (ok, length) and a payload.
+# Payloads are zlib-compressed ATTEMPT_DTYPE records in both directions.
+REQUEST = struct.Struct("<cHdI")
+RESPONSE = struct.Struct("<?I")
+UPLOAD, DOWNLOAD = b"U", b"D"
+
+logger = logging.getLogger(__name__)
+
+
+def pack_records(records):
+    return zlib.compress(np.ascontiguousarray(records, dtype=ATTEMPT_DTYPE).tobytes())
+
+
+def unpack_records(payload):
+    data = zlib.decompress(payload)
+    if len(data) % ATTEMPT_DTYPE.itemsize:
+        raise ValueError("truncated attempt records")
+    return np.frombuffer(data, dtype=ATTEMPT_DTYPE)
+
+
+def merge_into_errors(records, errors):
+    """Add the error scores of attempt records to the config.errors statistics"""
+    for mode in ("text", "video"):
+        selected = records[records["mode"] == MODES.index(mode)]
+        if not len(selected):
+            continue
+        per_letter = np.bincount(selected["target"], selected["error"].astype(np.float64), len(ASL_ALPHABET))
+        errors[f"{mode}_total_errors"] += float(per_letter.sum())
+        errors[f"{mode}_tests"] += len(selected)
+        for letter, added in zip(ASL_ALPHABET, per_letter):
+            errors["letters"][letter][f"{mode}_errors"] += float(added)
+
+
+def _recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data.extend(chunk)
+    return bytes(data)
+
+
+class HttpTransport:
+    """POST /profiles/<learner>/attempts uploads, GET with ?before=<timestamp> downloads"""
+
+    def __init__(self, base_url, timeout=SYNC_TIMEOUT_S):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _url(self, learner, **query):
+        url = f"{self.base_url}/profiles/{urllib.parse.quote(learner)}/attempts"
+        return f"{url}?{urllib.parse.urlencode(query)}" if query else url
+
+    def upload(self, learner, payload):
+        request = urllib.request.Request(self._url(learner), data=payload, method="POST",
+                                         headers={"Content-Type": "application/octet-stream"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+    def download(self, learner, before):
+        with urllib.request.urlopen(self._url(learner, before=before), timeout=self.timeout) as response:
+            return response.read()
+
+
+class TcpTransport:
+    """One short connection per request, using the REQUEST/RESPONSE framing"""
+
+    def __init__(self, address, timeout=SYNC_TIMEOUT_S):
+        self.address = address
+        self.timeout = timeout
+
+    def _request(self, operation, learner, before=0.0, payload=b""):
+        name = learner.encode("utf-8")
+        with socket.create_connection(self.address, timeout=self.timeout) as sock:
+            sock.sendall(REQUEST.pack(operation, len(name), before, len(payload)) + name + payload)
+            ok, length = RESPONSE.unpack(_recv_exact(sock, RESPONSE.size))
+            data = _recv_exact(sock, length)
+        if not ok:
+            raise ConnectionError(data.decode("utf-8", "replace"))
+        return data
+
+    def upload(self, learner, payload):
+        self._request(UPLOAD, learner, payload=payload)
+
+    def download(self, learner, before):
+        return self._request(DOWNLOAD, learner, before=before)
+
+
+def make_transport(endpoint):
+    """Returns: the transport for an "http://host:port" or "tcp://host:port" endpoint"""
+    parsed = urllib.parse.urlparse(endpoint)
+    if parsed.scheme in ("http", "https"):
+        return HttpTransport(endpoint)
+    if parsed.scheme == "tcp":
+        return TcpTransport((parsed.hostname, parsed.port))
+    raise ValueError(f"Unsupported sync endpoint: {endpoint}")
+
+
+class ProfileSync:
+    """
+    Uploads attempt records in the background and fetches a learner's records on login.
+
+    record() and login() only touch queues, so the Tk thread never waits on the network. The
+    sync thread groups records into batches of up to SYNC_BATCH_SIZE (or whatever arrived within
+    SYNC_INTERVAL_S) and retries failed uploads with exponential backoff. A retry may resend
+    records whose first upload got through without an answer; the service skips records it
+    already has. Records that are still unsent when the app closes are spooled to the learner's
+    profile and sent on the next run; closing lets an upload in progress finish but never starts one.
+    """
+
+    def __init__(self, endpoint=SYNC_ENDPOINT):
+        self.transport = make_transport(endpoint)
+        self.queue = queue.Queue(maxsize=SYNC_QUEUE_SIZE)
+        self.logins = queue.Queue()
+        self.merged = queue.Queue()  # (learner, login time, records) fetched for the UI thread to apply
+        self.last_login = None  # login time of the current learner, older fetches are stale
+        self.pending = []  # (learner, record) not uploaded yet
+        self.lock = threading.Lock()  # guards pending, which close() spools while an upload may run
+        self.stop = threading.Event()
+
+        self.uploaded = 0
+        self.dropped = 0
+        self.failures = 0  # consecutive failed uploads
+
+        self._load_spool()
+        self.thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.thread.start()
+
+    def record(self, learner, record):
+        try:
+            self.queue.put_nowait((learner, record))
+        except queue.Full:
+            self.dropped += 1
+
+    def login(self, learner):
+        """Fetch the learner's records made on other stations before now, they show up in poll_merged()"""
+        self.last_login = time.time()
+        self.logins.put((learner, self.last_login))
+
+    def poll_merged(self):
+        """Returns: list of (learner, records) fetched for the current login since the last call"""
+        results = []
+        while not self.merged.empty():
+            learner, before, records = self.merged.get_nowait()
+            # A fetch for an earlier login, e.g. A's when switching A -> B -> A, would count twice
+            if before == self.last_login:
+                results.append((learner, records))
+        return results
+
+    def _sync_loop(self):
+        next_upload = time.monotonic()  # spooled records are sent right away
+        while not self.stop.is_set():
+            had_pending = bool(self.pending)
+            self._drain_queue(timeout=0.5)
+            if self.pending and not had_pending and not self.failures:
+                next_upload = time.monotonic() + SYNC_INTERVAL_S  # wait for more records to batch with
+            self._handle_logins()
+
+            # A full batch goes out early, unless the service is failing and we are backing off
+            due = time.monotonic() >= next_upload or (len(self.pending) >= SYNC_BATCH_SIZE and not self.failures)
+            if not self.pending or not due or self.stop.is_set():
+                continue
+            if self._upload_batch():
+                self.failures = 0
+                next_upload = time.monotonic()  # send the rest of the backlog without waiting
+            else:
+                self.failures += 1
+                delay = min(SYNC_BACKOFF_MAX_S, SYNC_BACKOFF_S * 2 ** (self.failures - 1))
+                next_upload = time.monotonic() + delay * random.uniform(0.5, 1.0)  # jitter spreads the stations
+
+    def _drain_queue(self, timeout):
+        try:
+            items = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return
+        while not self.queue.empty():
+            items.append(self.queue.get_nowait())
+        with self.lock:
+            self.pending.extend(items)
+            if len(self.pending) > SYNC_MAX_PENDING:
+                # The service has been unreachable for a long time, keep the most recent records
+                self.dropped += len(self.pending) - SYNC_MAX_PENDING
+                del self.pending[:-SYNC_MAX_PENDING]
+
+    def _upload_batch(self):
+        """Upload the oldest pending records of one learner. Returns: whether it succeeded"""
+        with self.lock:
+            learner = self.pending[0][0]
+            batch = [item for item in self.pending[:SYNC_BATCH_SIZE] if item[0] == learner]
+        records = np.array([record for _, record in batch], dtype=ATTEMPT_DTYPE)
+        try:
+            self.transport.upload(learner, pack_records(records))
+        except (OSError, ConnectionError, http.client.HTTPException) as e:
+            if self.failures == 0:
+                logger.warning("Profile sync: upload failed (%s), retrying with backoff", e)
+            return False
+        sent = set(map(id, batch))
+        with self.lock:
+            self.pending = [item for item in self.pending if id(item) not in sent]
+        self.uploaded += len(records)
+        return True
+
+    def _handle_logins(self):
+        while not self.logins.empty():
+            learner, before = self.logins.get_nowait()
+            try:
+                records = unpack_records(self.transport.download(learner, before))
+            except (OSError, ConnectionError, http.client.HTTPException, ValueError, zlib.error) as e:
+                logger.warning("Profile sync: could not fetch %s's profile (%s)", learner, e)
+                continue
+            # The UI already counted this station's own attempts, uploaded or not, from its attempt log
+            own = profile_path(ATTEMPTS_FILE, learner)
+            if os.path.exists(own):
+                records = records[~np.isin(records["timestamp"], load_attempts(own)["timestamp"])]
+            self.merged.put((learner, before, records))
+
+    def _load_spool(self):
+        for path in glob.glob(os.path.join(PROFILES_DIR, "*", SYNC_SPOOL_FILE)):
+            learner = os.path.basename(os.path.dirname(path))
+            self.pending.extend((learner, record) for record in load_attempts(path))
+            os.remove(path)
+
+    def _write_spool(self):
+        by_learner = {}
+        with self.lock:
+            pending = list(self.pending)
+        for learner, record in pending:
+            by_learner.setdefault(learner, []).append(record)
+        for learner, records in by_learner.items():
+            with open(profile_path(SYNC_SPOOL_FILE, learner), "wb") as f:
+                f.write(MAGIC)
+                np.array(records, dtype=ATTEMPT_DTYPE).tofile(f)
+
+    def close(self):
+        """Stop syncing and spool what hasn't been sent, it goes out first on the next run"""
+        self.stop.set()
+        # An upload in progress ends within SYNC_TIMEOUT_S, then its records are either sent or
+        # still pending, never both
+        self.thread.join()
+        self._drain_queue(timeout=0)
+        self._write_spool()
+        logger.info("Profile sync: %d records uploaded, %d spooled, %d dropped",
+                    self.uploaded, len(self.pending), self.dropped)
+
+
+class AttemptStore:
+    """
+    Stand-in collection service storage: one attempt log per learner under SYNC_SERVER_DIR.
+    A record's timestamp identifies it, so records uploaded again by a retry are stored once.
+    """
+
+    def __init__(self, directory=SYNC_SERVER_DIR):
+        self.directory = directory
+        self.lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, learner):
+        # Learner names come from the network: quoting keeps them from escaping the directory, and
+        # unlike dropping characters it never maps two names to the same file
+        return os.path.join(self.directory, urllib.parse.quote(learner, safe="") + ".bin")
+
+    def append(self, learner, records):
+        path = self._path(learner)
+        with self.lock:
+            new_file = not os.path.exists(path)
+            if not new_file:
+                records = records[~np.isin(records["timestamp"], load_attempts(path)["timestamp"])]
+            _, first = np.unique(records["timestamp"], return_index=True)
+            with open(path, "ab") as f:
+                if new_file:
+                    f.write(MAGIC)
+                records[np.sort(first)].tofile(f)
+
+    def before(self, learner, timestamp):
+        path = self._path(learner)
+        with self.lock:
+            records = load_attempts(path) if os.path.exists(path) else np.zeros(0, dtype=ATTEMPT_DTYPE)
+        return records[records["timestamp"] < timestamp]
+
+
+def _http_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def _learner(self):
+            parts = urllib.parse.urlparse(self.path).path.strip("/").split("/")
+            if len(parts) != 3 or parts[0] != "profiles" or parts[2] != "attempts":
+                return None
+            return urllib.parse.unquote(parts[1])
+
+        def _reply(self, status, body=b""):
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            learner = self._learner()
+            if learner is None:
+                return self._reply(404)
+            try:
+                records = unpack_records(self.rfile.read(int(self.headers["Content-Length"])))
+            except (ValueError, TypeError, zlib.error):
+                return self._reply(400)
+            store.append(learner, records)
+            self._reply(204)
+
+        def do_GET(self):
+            learner = self._learner()
+            if learner is None:
+                return self._reply(404)
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+            before = float(query.get("before", [time.time()])[0])
+            self._reply(200, pack_records(store.before(learner, before)))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def _tcp_handler(store):
+    class Handler(socketserver.BaseRequestHandler):
+        def handle(self):
+            try:
+                operation, name_length, before, length = REQUEST.unpack(_recv_exact(self.request, REQUEST.size))
+                learner = _recv_exact(self.request, name_length).decode("utf-8")
+                payload = _recv_exact(self.request, length)
+                if operation == UPLOAD:
+                    store.append(learner, unpack_records(payload))
+                    reply = b""
+                else:
+                    reply = pack_records(store.before(learner, before))
+                self.request.sendall(RESPONSE.pack(True, len(reply)) + reply)
+            except (ValueError, zlib.error, UnicodeDecodeError) as e:
+                message = str(e).encode("utf-8")
+                self.request.sendall(RESPONSE.pack(False, len(message)) + message)
+            except ConnectionError:
+                pass
+
+    return Handler
+
+
+def serve(http_port=None, tcp_port=None, host="127.0.0.1", directory=SYNC_SERVER_DIR):
+    """Run the stand-in collection service until interrupted"""
+    store = AttemptStore(directory)
+    servers = []
+    if http_port:
+        servers.append(ThreadingHTTPServer((host, http_port), _http_handler(store)))
+        logger.info("Profile sync service: http://%s:%d", host, http_port)
+    if tcp_port:
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        servers.append(socketserver.ThreadingTCPServer((host, tcp_port), _tcp_handler(store)))
+        logger.info("Profile sync service: tcp://%s:%d", host, tcp_port)
+    for server in servers:
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        for server in servers:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stand-in collection service for profile sync")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--http-port", type=int, default=50632)
+    parser.add_argument("--tcp-port", type=int)
+    parser.add_argument("--directory", default=SYNC_SERVER_DIR, help="where the received records are stored")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+    serve(args.http_port, args.tcp_port, args.host, args.directory)